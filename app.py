@@ -1,35 +1,56 @@
 import argparse
 import datetime
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 warnings.simplefilter("ignore", UserWarning)
-import subprocess
 
 import dash
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
 import dash_html_components as html
+from dash.dependencies import Input, Output
+from flask import Response
 
 import layout as layout
+from src.daily_report import daily_report
+from src.metrics import metrics
+from src.monthly_report import monthly_report
 
 # Parse command line arguments
 parser = argparse.ArgumentParser()
 parser.add_argument("--daily", action="store_true")
 parser.add_argument("--monthly", action="store_true")
-args = parser.parse_args()
+parser.add_argument("--parallel", action="store_true")
 
-# Check if the daily report should be generated
-if args.daily:
-    print("Generando resumen diario")
-    subprocess.run(["python", "src/daily_report.py"])
 
-# Check if the monthly report should be generated
-if args.monthly:
-    if datetime.datetime.now().day == 1:
-        print("No hay suficientes datos para generar el reporte mensual.")
-    else:
-        print("Generando resumen mensual")
-        subprocess.run(["python", "src/monthly_report.py"])
+def run_reports(args):
+    """
+    Genera los reportes solicitados en la línea de comandos.
+    """
+    # Los reportes usan los mismos datos que el Dashboard (una sola lectura)
+    reports = []
+
+    # Check if the daily report should be generated
+    if args.daily:
+        print("Generando resumen diario")
+        reports.append(daily_report)
+
+    # Check if the monthly report should be generated
+    if args.monthly:
+        if datetime.datetime.now().day == 1:
+            print("No hay suficientes datos para generar el reporte mensual.")
+        else:
+            print("Generando resumen mensual")
+            reports.append(monthly_report)
+
+    if reports:
+        ds = layout.snapshot.ds
+        workers = len(reports) if args.parallel else 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for path in executor.map(lambda report: report(ds), reports):
+                print(f"Reporte guardado en {path}")
+
 
 external_stylesheets = [dbc.themes.JOURNAL]
 
@@ -37,11 +58,61 @@ external_stylesheets = [dbc.themes.JOURNAL]
 app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 
 
-app.layout = html.Div(
-    [dcc.Tabs([layout.graf1(), layout.graf2(), layout.graf3(), layout.graf4()])]
+def serve_layout():
+    """
+    Arma el layout con el Dashboard vigente en cada carga de la página, de modo que
+    siempre se muestre la última actualización terminada. Solo se envía el
+    contenido de la pestaña de resumen; el de las demás se pide al seleccionarlas.
+    """
+    ds = layout.snapshot.ds
+    return html.Div(
+        [
+            dcc.Tabs(
+                id="tabs",
+                value="res",
+                children=[
+                    layout.graf1(),
+                    layout.graf2(),
+                    layout.graf3(),
+                    layout.graf4(),
+                ],
+            ),
+            html.Div(id="tab-content", children=layout.tab_body(ds, "res")),
+        ]
+    )
+
+
+@app.callback(
+    Output("tab-content", "children"),
+    Input("tabs", "value"),
+    prevent_initial_call=True,
 )
+def render_tab(value):
+    return layout.tab_body(layout.snapshot.ds, value)
+
+
+app.layout = serve_layout
+
+# Aplicación WSGI de Flask, para servidores de producción (ver wsgi.py)
+server = app.server
+
+
+# Mediciones de tiempo y memoria (ver 'metrics' en config.yaml)
+if metrics.enabled:
+
+    @server.route("/metrics")
+    def metrics_text():
+        return Response(metrics.prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @server.route("/metrics.json")
+    def metrics_json():
+        return Response(metrics.to_json(), mimetype="application/json")
 
 
 # Run app
 if __name__ == "__main__":
+    run_reports(parser.parse_args())
+
+    # Actualización periódica del Dashboard en segundo plano
+    layout.snapshot.start()
     app.run_server(port="8050")
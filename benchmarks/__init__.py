@@ -0,0 +1,4 @@
+"""
+Benchmarks del Dashboard. Se ejecutan como scripts desde el directorio raíz
+(ver cada módulo).
+"""
@@ -0,0 +1,63 @@
+"""
+Verifica el tiempo de importación de los módulos que solo leen datos (Dashboard
+sin gráficos y los reportes) con python -X importtime: no deben importar
+plotly, dash, selenium, requests ni dotenv, y su importación debe tomar menos de
+--budget milisegundos. Termina con error si no se cumple.
+
+Desde el directorio raíz:
+    python benchmarks/bench_import.py --budget 800
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos de datos y módulos que no deben importar
+modules = ["dashboard", "src.daily_report", "src.monthly_report"]
+heavy = ["plotly", "dash", "selenium", "requests", "dotenv"]
+
+
+def import_times(module):
+    """
+    Importa el módulo en un proceso nuevo con -X importtime. Devuelve un
+    diccionario {módulo importado: tiempo acumulado en ms}.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root_dir,
+        capture_output=True,
+        text=True,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+
+    times = {}
+    for line in out.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=800, help="ms por módulo")
+    args = parser.parse_args()
+
+    failed = False
+    for module in modules:
+        times = import_times(module)
+        loaded = sorted({m.split(".")[0] for m in times if m.split(".")[0] in heavy})
+        total = times[module]
+        ok = total <= args.budget and not loaded
+        failed |= not ok
+
+        print(f"{module:>20}: {total:8.1f} ms {'OK' if ok else 'ERROR'}")
+        if loaded:
+            print(f"{'':>22}importa {', '.join(loaded)}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,193 @@
+"""
+Mide el tiempo y la memoria de cada etapa del Dashboard y de los reportes con
+datos sintéticos (ver synthetic.py), y guarda los resultados en un json para
+compararlos entre commits (ver compare.py).
+
+Las etapas se ejecutan en orden, --repeat veces en el mismo proceso: la primera
+vez con los cachés del proceso vacíos (umbrales y estaciones) y las siguientes con
+los cachés llenos, como en una actualización del dashboard en ejecución. Luego se
+repiten una vez más con tracemalloc para medir el pico de memoria de cada etapa
+(esa vez no se toma en cuenta el tiempo).
+
+Cada etapa mide solo su propio trabajo: la etapa Dashboard (constructor, con las
+sumas mensuales) reutiliza la tabla ya leída en la etapa lvera.
+
+Desde el directorio raíz:
+    python benchmarks/bench_pipeline.py --stations 200 --days 90 --output base.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from unittest import mock
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from benchmarks.synthetic import generate
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def stages():
+    """
+    Lista de etapas (nombre, función). Cada función recibe el estado (diccionario
+    con el Dashboard 'ds') y puede modificarlo. Los módulos del dashboard leen
+    config.yaml del directorio actual, por eso se importan recién aquí.
+    """
+    from dashboard import Dashboard
+    from src.archive import migrate_csv
+    from src.calculations import lvera
+    from src.daily_report import daily_report
+    from src.monthly_report import monthly_report
+
+    def read(state):
+        state["data"] = lvera(from_file=True)
+
+    def build(state):
+        # lvera ya se midió en su propia etapa: aquí se usa la tabla ya leída
+        with mock.patch("dashboard.lvera", lambda from_file: state["data"]):
+            state["ds"] = Dashboard(graphs=False, from_file=True)
+
+    return [
+        ("migrate_csv", lambda state: migrate_csv()),
+        ("lvera", read),
+        ("Dashboard", build),
+        ("summary_data", lambda state: state["ds"].summary_data()),
+        ("get_tables", lambda state: state["ds"].get_tables()),
+        ("get_anomalies", lambda state: state["ds"].get_anomalies()),
+        ("get_dec_maps", lambda state: state["ds"].get_dec_maps()),
+        ("get_today_maps", lambda state: state["ds"].get_today_maps()),
+        ("get_pp_by_province_map", lambda state: state["ds"].get_pp_by_province_map()),
+        ("get_time_series", lambda state: state["ds"].get_time_series()),
+        ("get_meteorogram", lambda state: state["ds"].get_meteorogram()),
+        ("daily_report", lambda state: daily_report(state["ds"])),
+        ("monthly_report", lambda state: monthly_report(state["ds"])),
+    ]
+
+
+def run(steps, memory=False):
+    """
+    Ejecuta las etapas una vez. Devuelve {etapa: segundos} o, con memory=True,
+    {etapa: pico de memoria en MB}. tracemalloc se inicia y se detiene en cada
+    etapa, de modo que el pico es solo el de esa etapa.
+    """
+    state, results = {}, {}
+    for name, func in steps:
+        if memory:
+            tracemalloc.start()
+            func(state)
+            results[name] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        else:
+            t0 = time.perf_counter()
+            func(state)
+            results[name] = time.perf_counter() - t0
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=root_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y MacOS en bytes
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def main(n_stations, n_days, repeat, seed, output, root=None):
+    keep = root is not None
+    root = os.path.abspath(root or tempfile.mkdtemp(prefix="dashboard_bench_"))
+    cwd = os.getcwd()
+    output = os.path.abspath(output)
+
+    t0 = time.perf_counter()
+    generate(root, n_stations, n_days, seed)
+    generate_time = time.perf_counter() - t0
+
+    os.chdir(root)
+    try:
+        steps = stages()
+        times = [run(steps) for _ in range(repeat)]
+        peaks = run(steps, memory=True)
+    finally:
+        os.chdir(cwd)
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    results = {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "stations": n_stations,
+            "days": n_days,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "generate_seconds": generate_time,
+        "stages": {
+            name: {
+                "seconds": [t[name] for t in times],
+                "first": times[0][name],
+                "best": min(t[name] for t in times),
+                "peak_mb": peaks[name],
+            }
+            for name, _ in steps
+        },
+        "max_rss_mb": max_rss_mb(),
+    }
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=30)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_pipeline.json")
+    parser.add_argument(
+        "--root", default=None, help="Directorio de los datos sintéticos (se conserva)"
+    )
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+    results = main(
+        args.stations, args.days, args.repeat, args.seed, args.output, args.root
+    )
+
+    print(f"\n{'etapa':>24} {'primera (s)':>12} {'mejor (s)':>10} {'pico (MB)':>10}")
+    for name, st in results["stages"].items():
+        print(
+            f"{name:>24} {st['first']:12.3f} {st['best']:10.3f} {st['peak_mb']:10.1f}"
+        )
+    print(f"\nResultados guardados en {args.output}")
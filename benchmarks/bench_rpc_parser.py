@@ -0,0 +1,57 @@
+"""
+Compara el tiempo de lectura de la tabla de lvera (Data/url.html) con
+pd.read_html (método anterior) y con RpcTable (lxml, fila por fila).
+
+Desde el directorio raíz:
+    python benchmarks/bench_rpc_parser.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+import yaml
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from src.calculations import RpcTable
+
+with open("config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+
+def read_html(page_source):
+    """
+    Lectura anterior: pd.read_html y arreglo de encabezados y códigos.
+    """
+    rpc = pd.read_html(page_source, header=[0, 1])[0]
+    rpc.columns = [c[0] if c[0] == c[1] else "_".join(c) for c in rpc.columns.values]
+    rpc.columns.values[5] = "Estacion"
+    rpc["Cod_Ant."] = rpc["Cod_Ant."].map(lambda x: "%06d" % x)
+    rpc["Cod."] = rpc["Cod."].map(lambda x: "%d" % x)
+    return rpc
+
+
+def rpc_table(page_source):
+    return RpcTable(page_source, resolve=False).to_frame()
+
+
+if __name__ == "__main__":
+    with open(config["files"]["url"], encoding="utf-8") as f:
+        page_source = f.read()
+
+    # Ambas lecturas deben dar los mismos códigos y valores
+    old, new = read_html(page_source), rpc_table(page_source)
+    value_cols = [c for c in old.columns if c.split("_")[0] in ["MIN", "MAX", "PP"]]
+    assert list(old["Cod."]) == list(new["Cod."])
+    assert list(old["Cod_Ant."]) == list(new["Cod_Ant."])
+    np.testing.assert_array_equal(
+        old[value_cols].to_numpy(dtype=float), new[value_cols].to_numpy(dtype=float)
+    )
+
+    n = 10
+    for name, func in [("pd.read_html", read_html), ("RpcTable", rpc_table)]:
+        t = min(timeit.repeat(lambda: func(page_source), number=1, repeat=n))
+        print(f"{name:>14}: {t * 1000:8.1f} ms (mejor de {n})")
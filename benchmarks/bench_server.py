@@ -0,0 +1,105 @@
+"""
+Prueba de carga del dashboard en ejecución (python app.py o gunicorn, ver
+wsgi.py): envía solicitudes concurrentes del layout de la página y del contenido
+de cada pestaña, y mide el rendimiento (solicitudes por segundo) y la latencia
+(percentiles 50, 95 y 99).
+
+Desde el directorio raíz, con el dashboard ya en ejecución:
+    python benchmarks/bench_server.py --requests 400 --concurrency 8
+"""
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+tabs = ["res", "tmax", "tmin", "pp"]
+
+
+def layout_request(url):
+    return urllib.request.Request(url + "/_dash-layout")
+
+
+def tab_request(url, value):
+    """
+    Solicitud del callback render_tab (contenido de la pestaña 'value').
+    """
+    payload = {
+        "output": "tab-content.children",
+        "outputs": {"id": "tab-content", "property": "children"},
+        "inputs": [{"id": "tabs", "property": "value", "value": value}],
+        "changedPropIds": ["tabs.value"],
+    }
+    return urllib.request.Request(
+        url + "/_dash-update-component",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def fetch(request):
+    """
+    Devuelve (segundos, bytes recibidos), o (segundos, None) si falla.
+    """
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            size = len(response.read())
+    except OSError:
+        size = None
+    return time.perf_counter() - t0, size
+
+
+def load_test(url, n_requests, concurrency):
+    """
+    Envía n_requests solicitudes (layout y pestañas, alternadas) con
+    'concurrency' clientes a la vez. Devuelve un diccionario con los resultados.
+    """
+    kinds = [layout_request(url)] + [tab_request(url, v) for v in tabs]
+    queue = [kinds[i % len(kinds)] for i in range(n_requests)]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, queue))
+    elapsed = time.perf_counter() - t0
+
+    latency = np.array([t for t, size in results if size is not None]) * 1000
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "errors": sum(size is None for _, size in results),
+        "seconds": elapsed,
+        "throughput": len(latency) / elapsed,
+        "p50_ms": float(np.percentile(latency, 50)) if len(latency) else None,
+        "p95_ms": float(np.percentile(latency, 95)) if len(latency) else None,
+        "p99_ms": float(np.percentile(latency, 99)) if len(latency) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8050")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", default=None, help="Archivo json de resultados")
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+
+    # Primera solicitud de cada tipo, para no medir la generación inicial
+    for request in [layout_request(url)] + [tab_request(url, v) for v in tabs]:
+        fetch(request)
+
+    results = load_test(url, args.requests, args.concurrency)
+    if results["errors"] == results["requests"]:
+        raise SystemExit(f"No se pudo conectar con {url}.")
+    print(
+        f"{results['throughput']:.1f} solicitudes/s, "
+        f"latencia p50 {results['p50_ms']:.0f} ms, p95 {results['p95_ms']:.0f} ms, "
+        f"p99 {results['p99_ms']:.0f} ms, {results['errors']} errores"
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
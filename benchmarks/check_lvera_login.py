@@ -0,0 +1,121 @@
+"""
+Verifica el ingreso a lvera con sesión HTTP (fetch_page_requests y scrape_data)
+contra un servidor local que imita la web: formulario de inicio de sesión con
+campos ocultos y botón 'entrar', cookie de sesión y reporte diario. Se prueba que
+con credenciales correctas se obtiene la tabla y que con credenciales incorrectas
+se detiene con un error sin reemplazar el último archivo guardado.
+
+Usa datos sintéticos en un directorio temporal (ver synthetic.py).
+
+Desde el directorio raíz:
+    python benchmarks/check_lvera_login.py
+"""
+import http.server
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from urllib.parse import parse_qs
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from benchmarks.synthetic import generate
+
+user, password = "usuario_prueba", "clave_prueba"
+
+login_page = b"""<html><body>
+<form method="POST" action="validar.php">
+<input type="text" name="usuario"><input type="password" name="password">
+<input type="hidden" name="token" value="abc123">
+<input type="submit" id="entrar" name="entrar" value="Ingresar">
+</form></body></html>"""
+
+
+def stub_handler(report):
+    """
+    Manejador del servidor local. Solo entrega el reporte con la cookie que se
+    obtiene al enviar el formulario completo (credenciales, campo oculto y botón).
+    """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        posts = []
+
+        def log_message(self, *args):
+            pass
+
+        def send(self, body, cookie=None):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if cookie:
+                self.send_header("Set-Cookie", cookie)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            logged = "sesion=ok" in self.headers.get("Cookie", "")
+            if self.path.endswith("reporte_diario_rpc.php") and logged:
+                self.send(report)
+            else:
+                # Sin sesión, la web vuelve a mostrar el formulario
+                self.send(login_page)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            fields = parse_qs(self.rfile.read(length).decode())
+            Handler.posts.append(fields)
+            ok = (
+                fields.get("usuario") == [user]
+                and fields.get("password") == [password]
+                and fields.get("token") == ["abc123"]
+                and "entrar" in fields
+            )
+            self.send(b"<html>ok</html>", "sesion=ok; Path=/" if ok else None)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    root = tempfile.mkdtemp(prefix="dashboard_lvera_")
+    generate(root, n_stations=10, n_days=10)
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        from src import calculations
+
+        with open(calculations.config["files"]["url"], "rb") as f:
+            report = f.read()
+
+        handler = stub_handler(report)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        calculations.config["lvera_url"] = (
+            f"http://127.0.0.1:{port}/site/lvera/captcha/login.php"
+        )
+        calculations.config["lvera_backend"] = "requests"
+
+        # Credenciales correctas: se obtiene la tabla completa
+        os.environ.update({"USERNAME": user, "PASSWORD": password})
+        rpc = calculations.scrape_data()
+        assert len(rpc.info["Cod."]) == 10, "no se leyó la tabla"
+        assert "entrar" in handler.posts[-1], "no se envió el botón 'entrar'"
+        print("Credenciales correctas: OK")
+
+        # Credenciales incorrectas: error y el archivo guardado no cambia
+        os.environ["PASSWORD"] = "otra"
+        try:
+            calculations.scrape_data()
+        except ValueError as e:
+            print(f"Credenciales incorrectas: OK ({e})")
+        else:
+            raise AssertionError("no se detectó el inicio de sesión fallido")
+        with open(calculations.config["files"]["url"], "rb") as f:
+            assert f.read() == report, "se reemplazó el archivo guardado"
+
+        server.shutdown()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,48 @@
+"""
+Compara dos resultados de bench_pipeline.py (por ejemplo, de dos commits):
+mejor tiempo y pico de memoria de cada etapa, y la razón nuevo / base.
+
+Desde el directorio raíz:
+    python benchmarks/compare.py base.json nuevo.json
+"""
+import argparse
+import json
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base, new):
+    """
+    Devuelve una lista de filas (etapa, mejor base, mejor nuevo, razón,
+    pico base, pico nuevo) con las etapas presentes en ambos resultados.
+    """
+    rows = []
+    for name, b in base["stages"].items():
+        n = new["stages"].get(name)
+        if n is None:
+            continue
+        ratio = n["best"] / b["best"] if b["best"] else float("nan")
+        rows.append((name, b["best"], n["best"], ratio, b["peak_mb"], n["peak_mb"]))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    if base["params"] != new["params"]:
+        print(f"Advertencia, parámetros distintos: {base['params']} y {new['params']}")
+
+    print(f"base:  {base['commit']}\nnuevo: {new['commit']}\n")
+    print(
+        f"{'etapa':>24} {'base (s)':>9} {'nuevo (s)':>9} {'razón':>6}"
+        f" {'base (MB)':>9} {'nuevo (MB)':>10}"
+    )
+    for name, tb, tn, ratio, mb, mn in compare(base, new):
+        print(f"{name:>24} {tb:9.3f} {tn:9.3f} {ratio:6.2f} {mb:9.1f} {mn:10.1f}")
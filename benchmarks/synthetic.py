@@ -0,0 +1,248 @@
+"""
+Genera un directorio con datos sintéticos para el Dashboard, con N estaciones y
+M días: config.yaml, lista de estaciones (filtro.xlsx), umbrales (PRC_*, norm y
+decadiarias), csv de Data/Series y la tabla de lvera (Data/url.html). Los
+archivos tienen el mismo formato que los reales, así que el Dashboard se puede
+ejecutar desde ese directorio con from_file=True.
+
+Desde el directorio raíz:
+    python benchmarks/synthetic.py --stations 200 --days 90 --root /tmp/sintetico
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import yaml
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+provinces = [
+    "CAJABAMBA",
+    "CAJAMARCA",
+    "CELENDIN",
+    "CHOTA",
+    "CONTUMAZA",
+    "CUTERVO",
+    "HUALGAYOC",
+    "JAEN",
+    "SAN IGNACIO",
+    "SAN MARCOS",
+    "SAN MIGUEL",
+    "SAN PABLO",
+    "SANTA CRUZ",
+]
+
+
+def station_list(rng, n_stations):
+    """
+    Dataframe con el formato de filtro.xlsx. Una de cada diez estaciones tiene
+    Dash = 0 (no se muestra en el dashboard, pero sí está en la web).
+    """
+    idx = np.arange(n_stations)
+    province = np.array(provinces)[idx % len(provinces)]
+    return pd.DataFrame(
+        {
+            "Cod": [str(200000 + i) for i in idx],
+            "Cod_old": ["%06d" % i for i in idx],
+            "Departamento": "CAJAMARCA",
+            "Provincia": province,
+            "Distrito": province,
+            "Nombre": ["EST %04d" % i for i in idx],
+            "Lat": rng.uniform(-7.9, -4.9, n_stations).round(5),
+            "Lon": rng.uniform(-79.4, -77.7, n_stations).round(5),
+            "Altitud": rng.integers(200, 4000, n_stations),
+            "Categoria": np.where(idx % 3 == 0, "PE", "CO"),
+            "Dash": np.where(idx % 10 == 9, 0, 1),
+        }
+    )
+
+
+def climatology(rng, n_stations):
+    """
+    Normales mensuales (12 x estaciones) de Tmax, Tmin y PP.
+    """
+    months = np.arange(12)[:, None]
+    season = np.cos(2 * np.pi * months / 12)
+    tmax = rng.uniform(15, 30, n_stations) + 1.0 * season
+    tmin = tmax - rng.uniform(8, 14, n_stations) + 1.5 * season
+    pp = rng.uniform(20, 150, n_stations) * (1.5 + season)
+    return {"Tmax": tmax.round(1), "Tmin": tmin.round(1), "PP": pp.round(1)}
+
+
+def daily_series(rng, normals, today, n_days):
+    """
+    Series diarias {variable: arreglo días x estaciones} de los últimos n_days
+    días hasta today, alrededor de las normales. Alrededor del 1 % de los datos
+    son -999 (faltantes) y el 2 % de la precipitación es -888 (trazas).
+    """
+    dates = pd.date_range(end=today, periods=n_days, freq="D")
+    month = dates.month.to_numpy() - 1
+    shape = (n_days, normals["Tmax"].shape[1])
+
+    tmax = normals["Tmax"][month] + rng.normal(0, 1.5, shape)
+    tmin = normals["Tmin"][month] + rng.normal(0, 1.5, shape)
+    pp = rng.exponential(normals["PP"][month] / 12) * (rng.random(shape) < 0.4)
+    pp[rng.random(shape) < 0.02] = -888
+
+    series = {"Tmax": tmax.round(1), "Tmin": tmin.round(1), "PP": pp.round(1)}
+    for values in series.values():
+        values[rng.random(shape) < 0.01] = -999
+    return dates, series
+
+
+def threshold_sheets(normals, names):
+    """
+    Hojas de PRC_TMAX, PRC_TMIN, PRC_PP, norm y decadiarias ({archivo: {hoja: df}}).
+    """
+    mes = pd.DataFrame({"MES": np.arange(1, 13)})
+
+    def sheet(values):
+        return pd.concat([mes, pd.DataFrame(values.round(1), columns=names)], axis=1)
+
+    tmax, tmin, pp = normals["Tmax"], normals["Tmin"], normals["PP"]
+    daily_pp = pp / 12
+
+    # Decadiarias: la normal mensual repartida en tres, una fila por decadiaria
+    dec = pd.DataFrame(np.repeat(pp / 3, 3, axis=0).round(1), columns=names)
+    dec.insert(0, "DECADIARIA", np.tile([1, 2, 3], 12))
+    dec.insert(0, "MES", np.repeat(np.arange(1, 13), 3))
+
+    return {
+        "PRC_TMAX.xlsx": {
+            f"prc_{p}": sheet(tmax + d) for p, d in [(90, 1.5), (95, 2.3), (99, 3.5)]
+        },
+        "PRC_TMIN.xlsx": {
+            f"prc_{p}": sheet(tmin - d) for p, d in [(1, 4.0), (5, 2.5), (10, 1.5)]
+        },
+        "PRC_PP.xlsx": {
+            f"prc_{p}": sheet(daily_pp * f) for p, f in [(90, 2), (95, 3), (99, 5)]
+        },
+        "norm.xlsx": {"TMAX": sheet(tmax), "TMIN": sheet(tmin), "PP": sheet(pp)},
+        "decadiarias.xlsx": {"Sheet1": dec},
+    }
+
+
+def lvera_html(stations, dates, series):
+    """
+    Código fuente de la tabla de lvera (reporte_diario_rpc.php): Tmin de los
+    últimos 7 días hasta hoy; Tmax y PP de los últimos 6 días hasta ayer.
+    """
+    groups = [("MIN", "Tmin", 7, 0), ("MAX", "Tmax", 6, 1), ("PP", "PP", 6, 1)]
+    info = ["Cod.", "Cod_Ant.", "Departamento", "Provincia", "Distrito", "Estación"]
+    info += ["Lat.", "Lon.", "Alt."]
+
+    header = "".join(f'<td rowspan="2"><p><b>{h}</b></p></td>' for h in info)
+    header += "".join(
+        f'<td colspan="{n}" align="center"><p><b>{var}</b></p></td>'
+        for var, _, n, _ in groups
+    )
+
+    columns, days = [], ""
+    for _, var, n, lag in groups:
+        end = len(dates) - lag
+        columns.append(series[var][end - n : end])
+        days += "".join(
+            f'<td scope="col" align="center"><p><b>{d.day:02d}</b></p></td>'
+            for d in dates[end - n : end]
+        )
+    values = np.concatenate(columns).T
+
+    meta = stations[
+        ["Cod", "Cod_old", "Departamento", "Provincia", "Distrito", "Nombre"]
+    ].to_numpy(dtype=str)
+    coords = stations[["Lat", "Lon", "Altitud"]].to_numpy(dtype=str)
+
+    rows = []
+    for texts, xyz, row in zip(meta, coords, values):
+        cells = list(texts) + list(xyz) + ["%g" % v for v in row]
+        rows.append(
+            "<tr>"
+            + "".join(f'<td align="center"><p3>{c}</p3></td>' for c in cells)
+            + "</tr>"
+        )
+
+    return (
+        '<html><head><meta http-equiv="Content-Type" content="text/html; '
+        'charset=utf-8"></head><body>\n<table class="tabla"><tbody>\n'
+        f"<tr>{header}</tr>\n<tr>{days}</tr>\n" + "\n".join(rows) + "\n"
+        "</tbody></table></body></html>\n"
+    )
+
+
+def generate(root, n_stations=30, n_days=60, seed=0, today=None):
+    """
+    Escribe los datos sintéticos en root (se crea si no existe). Devuelve root.
+
+    Parámetros:
+    root: directorio de salida; sus rutas siguen las de config.yaml.
+    n_stations: número de estaciones.
+    n_days: días de las series (hasta today).
+    seed: semilla de los números aleatorios.
+    today: último día de los datos. Por defecto, hoy.
+    """
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(today or date.today()).normalize()
+
+    # Configuración del repositorio, sin caché de figuras ni escritura de series
+    with open(os.path.join(root_dir, "config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    config.update(
+        {
+            "export_to_archive": False,
+            "refresh_minutes": 0,
+            "figure_cache": False,
+            "graphs": False,
+        }
+    )
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "config.yaml"), "w") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+
+    def path(key, *parts):
+        full = os.path.join(root, config[key][parts[0]], *parts[1:])
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        return full
+
+    with open(path("files", "mapbox_token"), "w") as f:
+        f.write("pk.sintetico")
+
+    stations = station_list(rng, n_stations)
+    stations.to_excel(path("files", "list"), index=False)
+
+    normals = climatology(rng, n_stations)
+    for file, sheets in threshold_sheets(normals, stations["Nombre"]).items():
+        with pd.ExcelWriter(path("paths", "umbrales", file)) as writer:
+            for name, df in sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+
+    dates, series = daily_series(rng, normals, today, n_days)
+    fechas = dates.strftime("%Y-%m-%d")
+    for i, st in stations.iterrows():
+        st_file = path(
+            "paths", "series", st["Provincia"], f"{st['Cod']}_{st['Nombre']}.csv"
+        )
+        df = pd.DataFrame({"Fecha": fechas})
+        for var, values in series.items():
+            df[var] = values[:, i]
+        df.to_csv(st_file, index=False)
+
+    with open(path("files", "url"), "w", encoding="utf-8") as f:
+        f.write(lvera_html(stations, dates, series))
+
+    return root
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=30)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", required=True)
+    args = parser.parse_args()
+
+    if args.days < 7:
+        sys.exit("Se necesitan al menos 7 días (tabla de lvera).")
+    print(generate(args.root, args.stations, args.days, args.seed))
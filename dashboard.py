@@ -1,6 +1,11 @@
+import glob
+import os
+import sys
+import threading
+import time
 from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from time import sleep
 
 import pandas as pd
 import yaml
@@ -8,44 +13,210 @@ from dateutil.relativedelta import relativedelta
 from tqdm import tqdm
 
 from src.calculations import *
+from src.figure_cache import FigureCache
+from src.filelock import file_lock
+from src.metrics import metrics
 
 with open("config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
 
+class LazyAttribute:
+    """
+    Atributo de Dashboard que se calcula recién la primera vez que se solicita,
+    llamando al método que lo genera (junto con los demás atributos del mismo
+    método). Luego queda guardado en la instancia y no se vuelve a calcular.
+
+    Parámetros:
+    method: nombre del método de Dashboard que asigna el atributo.
+    """
+
+    def __init__(self, method):
+        self.method = method
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+
+        with obj._lock:
+            lock = obj._method_locks.setdefault(self.method, threading.RLock())
+        with lock:
+            if self.name not in obj.__dict__:
+                getattr(obj, self.method)()
+                obj.save_figures()
+        return obj.__dict__[self.name]
+
+
+@metrics.instrument
 class Dashboard:
-    def __init__(self, graphs=config["graphs"], from_file=False):
+    # Datos derivados
+    last_data_df = LazyAttribute("get_last_data")
+    mx_mean = LazyAttribute("summary_data")
+    mn_mean = LazyAttribute("summary_data")
+    pp_sum = LazyAttribute("summary_data")
+
+    # Gráficos y tablas
+    fig_mx = LazyAttribute("get_time_series")
+    fig_mn = LazyAttribute("get_time_series")
+    fig_pp = LazyAttribute("get_time_series")
+    ctmax = LazyAttribute("get_tables")
+    ctmin = LazyAttribute("get_tables")
+    cpp = LazyAttribute("get_tables")
+    amx = LazyAttribute("get_anomalies")
+    amn = LazyAttribute("get_anomalies")
+    app = LazyAttribute("get_anomalies")
+    map_amx = LazyAttribute("get_anomalies")
+    map_amn = LazyAttribute("get_anomalies")
+    map_app = LazyAttribute("get_anomalies")
+    pp_accum = LazyAttribute("get_pp_by_province_map")
+    d1 = LazyAttribute("get_dec_maps")
+    d2 = LazyAttribute("get_dec_maps")
+    d3 = LazyAttribute("get_dec_maps")
+    meteogram = LazyAttribute("get_meteorogram")
+    map_last_tmin = LazyAttribute("get_today_maps")
+    map_last_tmax = LazyAttribute("get_today_maps")
+    map_last_pp = LazyAttribute("get_today_maps")
+
+    # Figuras que se guardan en el caché (ver FigureCache)
+    figures = [
+        "fig_mx",
+        "fig_mn",
+        "fig_pp",
+        "amx",
+        "amn",
+        "app",
+        "map_amx",
+        "map_amn",
+        "map_app",
+        "pp_accum",
+        "d1",
+        "d2",
+        "d3",
+        "meteogram",
+        "map_last_tmin",
+        "map_last_tmax",
+        "map_last_pp",
+    ]
+
+    def __init__(self, graphs=config["graphs"], from_file=False, today=None):
         """
         Recibe como parámetro el booleano graphs. Por defecto es True.
-        Para pruebas, asignar False al llamar a la clase, cuando se quiera
-        obtener SOLO los datos.
+        Con False solo se leen los datos al crear la instancia; los datos derivados
+        y los gráficos se calculan recién cuando se solicitan por primera vez.
+
+        Con today (fecha pasada) el Dashboard se arma como si fuera ese día, con los
+        datos del archivo de series en lugar de la web (ver monthly_report).
         """
+        self._lock = threading.Lock()
+        self._method_locks = {}
+        self._classifications = {}
         self.from_file = from_file
+        self.from_archive = today is not None
         self.data_path = config["paths"]["data"]
         self.umb_path = config["paths"]["umbrales"]
-        self.get_day_month()
+        self.get_day_month(today)
         self.get_files()
 
         # Llamar a las funciones auxiliares y mostrar mensajes después de cada una
         self.read_lvera()
-        self.get_last_data()
-        self.summary_data()
+        self.load_figures()
 
         if graphs:
-            methods = [
-                self.get_time_series(),
-                self.get_tables(),
-                self.get_anomalies(),
-                self.get_pp_by_province_map(),
-                self.get_dec_maps(),
-                self.get_meteorogram(),
-                self.get_today_maps(),
-            ]
+            self.get_graphs()
+
+    def get_graphs(self):
+        """
+        Genera todos los gráficos. Cada método solo lee los datos ya calculados
+        (mx, mn, pp, promedios y últimos datos), por lo que se ejecutan en paralelo
+        y la barra de progreso avanza a medida que cada uno termina.
+        """
+        methods = [
+            self.get_time_series,
+            self.get_tables,
+            self.get_anomalies,
+            self.get_pp_by_province_map,
+            self.get_dec_maps,
+            self.get_meteorogram,
+            self.get_today_maps,
+        ]
+
+        # Se omiten los métodos cuyos gráficos ya se leyeron del caché
+        pending = {
+            attr.method
+            for name, attr in vars(Dashboard).items()
+            if isinstance(attr, LazyAttribute) and name not in self.__dict__
+        }
+        methods = [method for method in methods if method.__name__ in pending]
+        if not methods:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(methods)) as executor:
+            futures = [executor.submit(method) for method in methods]
+            for future in tqdm(
+                as_completed(futures),
+                total=len(futures),
+                desc="Generando gráficos",
+                colour="red",
+            ):
+                future.result()
+
+        self.save_figures()
+
+    def load_figures(self):
+        """
+        Lee del caché las figuras ya generadas con los mismos datos y fecha; estas
+        ya no se vuelven a generar.
+        """
+        self.figure_cache = None
+        if not config["figure_cache"] or self.from_archive:
+            return
+
+        self.figure_cache = FigureCache(
+            config["paths"]["figures"],
+            self.today.strftime("%Y-%m-%d"),
+            [
+                self.cube,
+                self.mx.index.values.astype("int64"),
+                np.array(self.mx.columns, dtype=str),
+            ],
+            sources=[__file__, sys.modules[Clasification.__module__].__file__],
+            inputs=[self.file, self.file_w_normals, self.dec_file]
+            + sorted(glob.glob(os.path.join(self.umb_path, "PRC_*.xlsx"))),
+            settings=[
+                self.mapbox_token,
+                {key: config[key] for key in ("plu_st", "figure_cache")},
+            ],
+        )
+        self.__dict__.update(self.figure_cache.load())
 
-            for i in tqdm(range(len(methods)), desc="Generando gráficos", colour="red"):
-                for method in methods:
-                    method
-                    sleep(0.1)
+    def save_figures(self):
+        """
+        Convierte en diccionarios las figuras recién generadas, para que sean del
+        mismo tipo que las leídas del caché, y guarda en el caché las que aún no
+        están guardadas. Si no se pueden guardar, solo se muestra el error: el
+        caché no es necesario para el Dashboard.
+        """
+        for name in self.figures:
+            fig = self.__dict__.get(name)
+            if fig is not None and not isinstance(fig, dict):
+                self.__dict__[name] = fig.to_dict()
+
+        if self.figure_cache is None:
+            return
+
+        try:
+            self.figure_cache.save(
+                {
+                    name: self.__dict__[name]
+                    for name in self.figures
+                    if name in self.__dict__
+                }
+            )
+        except Exception as e:
+            print(f"No se pudieron guardar los gráficos en el caché: {e}")
 
     def get_files(self):
         """
@@ -60,30 +231,33 @@ class Dashboard:
     def read_lvera(self):
         """
         Este método importa la función lvera para la recolección de datos de la web.
-        """
-        self.data = lvera(self.from_file)
 
-        for i in self.data.keys():
-            self.data[i]["Tmax"] = self.data[i]["Tmax"].astype(float)
-            self.data[i]["Tmin"] = self.data[i]["Tmin"].astype(float)
-            self.data[i]["PP"] = self.data[i]["PP"].astype(float)
+        Las 3 variables se apilan en un solo arreglo (variable x fecha x estación),
+        se reemplazan los valores -999 y -888 una sola vez, y mx, mn y pp son vistas
+        (sin copia) de ese arreglo.
+        """
+        if self.from_archive:
+            end = pd.Timestamp(self.today).normalize()
+            self.data = archive_data(end - pd.Timedelta(days=44), end)
+        else:
+            self.data = lvera(self.from_file)
 
-            self.data[i].replace(-999.0, np.nan, inplace=True)
-            self.data[i].replace(-999, np.nan, inplace=True)
-            self.data[i].replace(-888, 0.01, inplace=True)
+        variables = ["Tmax", "Tmin", "PP"]
+        ref = self.data[variables[0]]
+        self.cube = resolve_sentinels(
+            np.stack([self.data[var].to_numpy(dtype=float) for var in variables])
+        )
 
         dataframes = {}
-        for var in ["Tmin", "Tmax", "PP"]:
-            var_data = {}
-            for st in self.data.keys():
-                var_data[st] = self.data[st][var].values.tolist()
-                var_data["Fecha"] = self.data[st]["Fecha"].tolist()
-
-            df = pd.DataFrame.from_dict(var_data)
-            df.set_index("Fecha", inplace=True)
-            dataframes[var] = df
+        for i, var in enumerate(variables):
+            dataframes[var] = pd.DataFrame(
+                self.cube[i], index=ref.index, columns=ref.columns, copy=False
+            )
 
         self.dataframes = dataframes
+
+        # Sumas, conteos y decadiarias de cada mes de la ventana (una sola vez)
+        self.months = {var: month_stats(df) for var, df in dataframes.items()}
         self.mx = dataframes["Tmax"]
         self.mn = dataframes["Tmin"]
         self.pp = dataframes["PP"]
@@ -120,11 +294,12 @@ class Dashboard:
 
         self.last_data_df = last_data_df
 
-    def get_day_month(self):
+    def get_day_month(self, today=None):
         """
         Método para determinar días, meses, cantidad de días del mes, etc.
+        Por defecto a partir de la fecha actual.
         """
-        self.today = datetime.now()
+        self.today = today or datetime.now()
         self.day = self.today.day
         self.today_date = self.today.strftime("%d-%b-%Y")
         self.year = self.today.year
@@ -167,26 +342,24 @@ class Dashboard:
 
         return month, days_list, day, date_str
 
-    def get_monthly_means(self, var, df, this_month):
+    def get_monthly_means(self, var, this_month):
         """
-        Este método filtra los últimos 45 datos recibidos por Dashboard para calcular
-        los promedios y acumulados del mes actual dependiendo de la variable.
+        Devuelve los promedios (temperaturas) o acumulados (precipitación) del mes
+        this_month, a partir de las sumas mensuales (MonthStats).
         """
         var = var.lower()
-        this_month, _, _, _ = self.filter_month()
 
-        # Hacer filtro de estaciones que tienen normales
         if var == "tmax":
-            df = df[df.index.month == this_month]
-            df = pd.DataFrame(columns=["Mean"], data=df.mean(axis=0).round(1))
+            acc = self.months["Tmax"][this_month]
+            df = pd.DataFrame(columns=["Mean"], data=acc.mean().round(1))
         elif var == "tmin":
-            df = df[df.index.month == self.this_month]
-            df = pd.DataFrame(columns=["Mean"], data=df.mean(axis=0).round(1))
+            acc = self.months["Tmin"][this_month]
+            df = pd.DataFrame(columns=["Mean"], data=acc.mean().round(1))
         elif var == "pp":
-            df = df[df.index.month == this_month]
-            df = pd.DataFrame(columns=["Sum"], data=df.sum(axis=0).round(1))
+            acc = self.months["PP"][this_month]
+            df = pd.DataFrame(columns=["Sum"], data=acc.sum().round(1))
         else:
-            ValueError("Variable no soportada.")
+            raise ValueError("Variable no soportada.")
         return df
 
     def summary_data(self):
@@ -195,9 +368,9 @@ class Dashboard:
         """
         this_month, _, _, _ = self.filter_month()
 
-        self.mx_mean = self.get_monthly_means("tmax", self.mx, this_month)
-        self.mn_mean = self.get_monthly_means("tmin", self.mn, self.this_month)
-        self.pp_sum = self.get_monthly_means("pp", self.pp, this_month)
+        self.mx_mean = self.get_monthly_means("tmax", this_month)
+        self.mn_mean = self.get_monthly_means("tmin", self.this_month)
+        self.pp_sum = self.get_monthly_means("pp", this_month)
 
     def get_time_series(self):
         """
@@ -208,19 +381,49 @@ class Dashboard:
         self.fig_mn = series("tmin", self.mn, self.this_month, self.day)
         self.fig_pp = series("pp", self.pp, this_month, day)
 
+    def get_classification(self, var, this_month, days_list):
+        """
+        Devuelve la caracterización (Clasification) de la variable para el mes y
+        los días indicados. Se calcula una sola vez y la usan tanto las tablas del
+        dashboard como el reporte mensual.
+        """
+        data = {
+            "tmax": ("Tmax", self.mx),
+            "tmin": ("Tmin", self.mn),
+            "pp": ("PP", self.pp),
+        }
+        var_name, df = data[var]
+        key = (var, this_month, tuple(days_list))
+
+        with self._lock:
+            lock = self._method_locks.setdefault(
+                "get_classification", threading.RLock()
+            )
+        with lock:
+            if key not in self._classifications:
+                self._classifications[key] = Clasification(
+                    var,
+                    df,
+                    this_month,
+                    days_list,
+                    self.umb_path,
+                    self.months[var_name][this_month].frame(),
+                )
+        return self._classifications[key]
+
     def get_tables(self):
         """
         Genera las tablas de caracterización para las 3 variables.
         """
         this_month, this_month_days_list, _, _ = self.filter_month()
-        self.ctmax = Clasification(
-            "tmax", self.mx, this_month, this_month_days_list, self.umb_path
+        self.ctmax = self.get_classification(
+            "tmax", this_month, this_month_days_list
         ).style_tmax()
-        self.ctmin = Clasification(
-            "tmin", self.mn, self.this_month, self.this_month_days_list, self.umb_path
+        self.ctmin = self.get_classification(
+            "tmin", self.this_month, self.this_month_days_list
         ).style_tmin()
-        self.cpp = Clasification(
-            "pp", self.pp, this_month, this_month_days_list, self.umb_path
+        self.cpp = self.get_classification(
+            "pp", this_month, this_month_days_list
         ).style_pp()
 
     def get_anomalies(self):
@@ -252,46 +455,28 @@ class Dashboard:
         Genera el mapa de precipitación acumulada mensual por provincia.
         """
         # Añadiendo provincias y coordenadas
-        pp_sum = Utils(self.pp_sum, self.file).add_lat_lon_prov()
+        pp_sum = Utils(self.pp_sum.copy(), self.file).add_lat_lon_prov()
         pp_sum = pp_sum.rename_axis("Estaciones").reset_index()
-        pp_sum["size"] = 20
-
-        opt = {
-            "Estaciones": True,
-            "Provincia": True,
-            "Lat": False,
-            "Lon": False,
-            "Sum": True,
-            "size": False,
-        }
 
-        mapbx = px.scatter_mapbox(
-            pp_sum,
-            lat="Lat",
-            lon="Lon",
-            hover_name="Estaciones",
-            color="Provincia",
-            size="Sum",
+        # Un color por provincia, en orden de aparición
+        provinces, _ = pd.factorize(pp_sum["Provincia"])
+        colors = px.colors.qualitative.Bold
+        colors = np.array(colors)[provinces % len(colors)]
+
+        mapbx = station_map(
+            self.mapbox_token,
+            pp_sum["Estaciones"],
+            pp_sum["Lat"],
+            pp_sum["Lon"],
+            hover={
+                "Provincia": pp_sum["Provincia"],
+                "Sum": pp_sum["Sum"],
+                "Estaciones": pp_sum["Estaciones"],
+            },
+            color=colors,
+            size=pp_sum["Sum"],
             size_max=30,
-            color_discrete_sequence=px.colors.qualitative.Bold,
-            hover_data=opt,
-            height=500,
-            width=600,
-        )
-
-        mapbx.update_layout(
-            hovermode="closest",
-            autosize=False,
-            mapbox=dict(
-                accesstoken=self.mapbox_token,
-                bearing=0,
-                center=go.layout.mapbox.Center(lat=-7.16, lon=-78.49),
-                style="light",
-                pitch=0,
-                zoom=8,
-            ),
-            margin=dict(t=0, b=0, l=0, r=0),
-            showlegend=False,
+            opacity=None,
         )
 
         self.pp_accum = mapbx
@@ -302,15 +487,14 @@ class Dashboard:
         """
         this_month, _, _, _ = self.filter_month()
 
-        self.d1 = Decadiarias(self.pp, this_month, self.file, self.dec_file).maps(
-            "d1", self.mapbox_token
-        )
-        self.d2 = Decadiarias(self.pp, this_month, self.file, self.dec_file).maps(
-            "d2", self.mapbox_token
-        )
-        self.d3 = Decadiarias(self.pp, this_month, self.file, self.dec_file).maps(
-            "d3", self.mapbox_token
+        dec = Decadiarias(
+            self.pp,
+            this_month,
+            self.file,
+            self.dec_file,
+            self.months["PP"][this_month].dekads(),
         )
+        self.d1, self.d2, self.d3 = dec.maps_all(self.mapbox_token)
 
     def get_meteorogram(self):
         last_data = LastData(self.last_data_df)
@@ -321,3 +505,91 @@ class Dashboard:
         self.map_last_tmin = last_data.map_temps("tmin", self.mapbox_token)
         self.map_last_tmax = last_data.map_temps("tmax", self.mapbox_token)
         self.map_last_pp = last_data.map_pp(self.mapbox_token)
+
+
+class DashboardRefresher:
+    """
+    Mantiene el Dashboard vigente y lo reemplaza periódicamente por uno nuevo,
+    construido en segundo plano. El reemplazo es una sola asignación, por lo que
+    quien lea 'ds' siempre obtiene un Dashboard completo (el anterior mientras se
+    construye el nuevo).
+
+    Si varios procesos comparten la carpeta de datos (workers de gunicorn), en cada
+    intervalo solo uno vuelve a leer lvera (con un candado entre procesos); los
+    demás leen la página que este guardó (archivo url) y los gráficos del caché, de
+    modo que todos muestran los mismos datos.
+
+    Parámetros:
+    minutes: intervalo de actualización en minutos (0 para no actualizar).
+    from_file: se pasa a Dashboard.
+    """
+
+    def __init__(self, minutes, from_file=False):
+        self.minutes = minutes
+        self.from_file = from_file
+        self._stop = threading.Event()
+        self._thread = None
+        self.lock_file = os.path.join(config["paths"]["data"], ".refresh.lock")
+
+        # El primer Dashboard genera sus gráficos recién cuando se solicitan
+        self.ds = Dashboard(graphs=False, from_file=from_file)
+        self.page_time = self.saved_page_time()
+
+    def saved_page_time(self):
+        """
+        Fecha de modificación de la última página de lvera guardada (0 si no hay).
+        """
+        try:
+            return os.path.getmtime(config["files"]["url"])
+        except OSError:
+            return 0
+
+    def refresh(self):
+        """
+        Construye un nuevo Dashboard (con todos sus gráficos) y lo pone en uso.
+        Solo se vuelve a leer lvera si la última página guardada (por este u otro
+        proceso) tiene al menos medio intervalo; si no, y es más reciente que la de
+        este Dashboard, se usa esa página. Devuelve False si no hubo nada nuevo.
+        """
+        with file_lock(self.lock_file):
+            page_time = self.saved_page_time()
+            if time.time() - page_time >= self.minutes * 30:
+                self.ds = Dashboard(graphs=True, from_file=self.from_file)
+                self.page_time = self.saved_page_time()
+                return True
+
+        if page_time <= self.page_time:
+            return False
+
+        self.ds = Dashboard(graphs=True, from_file=True)
+        self.page_time = page_time
+        return True
+
+    def start(self):
+        """
+        Inicia la actualización periódica en un hilo en segundo plano.
+        """
+        if not self.minutes or self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Un proceso creado después de la última actualización (por ejemplo, un
+        # worker que se reinicia) parte con el Dashboard del proceso principal
+        if self.saved_page_time() > self.page_time:
+            self._update()
+
+        while not self._stop.wait(self.minutes * 60):
+            self._update()
+
+    def _update(self):
+        try:
+            if self.refresh():
+                print(f"Dashboard actualizado: {datetime.now():%d-%b-%Y %H:%M}")
+        except Exception as e:
+            print(f"No se pudo actualizar el Dashboard: {e}")
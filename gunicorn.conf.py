@@ -0,0 +1,27 @@
+"""
+Configuración de gunicorn para el dashboard (ver wsgi.py). Desde el directorio
+raíz:
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Las opciones de la línea de comandos tienen prioridad (por ejemplo, -w 8).
+"""
+import multiprocessing
+
+bind = "0.0.0.0:8050"
+
+# Un worker por núcleo: con más, el rendimiento no mejora (ver README)
+workers = multiprocessing.cpu_count()
+
+# El Dashboard se construye una sola vez, antes de crear los workers
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Los hilos no pasan del proceso principal a los workers: cada worker inicia
+    # su actualización periódica del Dashboard ('refresh_minutes'). En cada
+    # intervalo solo uno vuelve a leer lvera; los demás usan la página que este
+    # guardó y los gráficos del caché (ver DashboardRefresher)
+    import layout
+
+    layout.snapshot.start()
@@ -1,9 +1,12 @@
-import yaml
+import threading
 import warnings
+import weakref
+
+import yaml
 
 warnings.simplefilter("ignore", UserWarning)
 
-from dashboard import Dashboard
+from dashboard import DashboardRefresher
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_bootstrap_components as dbc
@@ -12,7 +15,9 @@ with open("config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
 
-ds = Dashboard()
+# Dashboard vigente. Los gráficos se generan recién al armar cada pestaña, y se
+# reemplaza por uno nuevo en segundo plano cada 'refresh_minutes'.
+snapshot = DashboardRefresher(config["refresh_minutes"])
 
 card_body_style = {"textAlign": "center"}
 
@@ -84,7 +89,7 @@ def prp_text6():
     return create_card("3ra Decadiaria")
 
 
-def res():
+def res(ds):
     return html.Div(
         [
             dbc.Card(
@@ -128,7 +133,7 @@ def res():
     )
 
 
-def tmax():
+def tmax(ds):
     return html.Div(
         [
             dbc.Card(
@@ -193,7 +198,7 @@ def tmax():
     )
 
 
-def tmin():
+def tmin(ds):
     return html.Div(
         [
             dbc.Card(
@@ -248,7 +253,7 @@ def tmin():
     )
 
 
-def pp():
+def pp(ds):
     return html.Div(
         [
             dbc.Card(
@@ -335,53 +340,55 @@ def pp():
     )
 
 
-def graf1():
+def tab(label, value, color):
     return dcc.Tab(
-        label="Resumen 24 hrs",
-        children=[res()],
+        label=label,
+        value=value,
         selected_style={
             "borderTop": "1px solid #d6d6d6",
             "borderBottom": "1px solid #d6d6d6",
-            "backgroundColor": "#bfbfbf",
+            "backgroundColor": color,
             "color": "white",
         },
     )
 
 
+def graf1():
+    return tab("Resumen 24 hrs", "res", "#bfbfbf")
+
+
 def graf2():
-    return dcc.Tab(
-        label="Temperatura máxima",
-        children=[tmax()],
-        selected_style={
-            "borderTop": "1px solid #d6d6d6",
-            "borderBottom": "1px solid #d6d6d6",
-            "backgroundColor": "#f78d7b",
-            "color": "white",
-        },
-    )
+    return tab("Temperatura máxima", "tmax", "#f78d7b")
 
 
 def graf3():
-    return dcc.Tab(
-        label="Temperatura mínima",
-        children=[tmin()],
-        selected_style={
-            "borderTop": "1px solid #d6d6d6",
-            "borderBottom": "1px solid #d6d6d6",
-            "backgroundColor": "#4eadf3",
-            "color": "white",
-        },
-    )
+    return tab("Temperatura mínima", "tmin", "#4eadf3")
 
 
 def graf4():
-    return dcc.Tab(
-        label="Precipitación",
-        children=[pp()],
-        selected_style={
-            "borderTop": "1px solid #d6d6d6",
-            "borderBottom": "1px solid #d6d6d6",
-            "backgroundColor": "#a7ea52",
-            "color": "white",
-        },
-    )
+    return tab("Precipitación", "pp", "#a7ea52")
+
+
+# Contenido de cada pestaña, generado recién cuando se selecciona
+tab_builders = {"res": res, "tmax": tmax, "tmin": tmin, "pp": pp}
+
+# Contenido ya generado y candados de cada pestaña, por Dashboard (se descartan
+# junto con cada Dashboard)
+_tab_cache = weakref.WeakKeyDictionary()
+_tab_lock = threading.Lock()
+
+
+def tab_body(ds, value):
+    """
+    Devuelve el contenido de la pestaña 'value' para el Dashboard ds. Se genera una
+    sola vez por Dashboard y luego se reutiliza en cada solicitud. Cada pestaña
+    tiene su propio candado, de modo que mientras se genera una, las demás (y las
+    de otros Dashboards) se siguen sirviendo.
+    """
+    with _tab_lock:
+        bodies, locks = _tab_cache.setdefault(ds, ({}, {}))
+        lock = locks.setdefault(value, threading.Lock())
+    with lock:
+        if value not in bodies:
+            bodies[value] = tab_builders[value](ds)
+    return bodies[value]
@@ -0,0 +1,219 @@
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.filelock import file_lock
+
+# Abrir el archivo YAML
+with open("config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+
+class StationArchive:
+    """
+    Archivo columnar con las series diarias de todas las estaciones. Reemplaza
+    a los csv de Data/Series (uno por estación).
+
+    Cada variable (Tmax, Tmin y PP) se guarda en un archivo binario {var}.f8 con
+    una fila por día y una columna por estación (float64), que se lee con
+    np.memmap, de modo que solo se cargan las filas del rango solicitado.
+    El archivo meta.json guarda la fecha de la primera fila y los códigos de las
+    estaciones en el orden de las columnas. Los días nuevos se agregan al final
+    de los archivos sin reescribirlos.
+
+    Los valores se guardan tal como vienen de lvera (con -999 y -888). Las fechas
+    o estaciones que no están en el archivo se leen como -999.
+
+    Las lecturas y escrituras usan un candado entre procesos (archivo .lock), de
+    modo que ningún proceso lee los archivos mientras otro los reescribe.
+
+    Parámetros:
+    path: carpeta del archivo.
+    """
+
+    variables = ["Tmax", "Tmin", "PP"]
+    missing = -999.0
+
+    def __init__(self, path=config["paths"]["archive"]):
+        self.path = path
+        self.meta_file = os.path.join(path, "meta.json")
+        self.lock_file = os.path.join(path, ".lock")
+
+    def var_file(self, var):
+        return os.path.join(self.path, f"{var}.f8")
+
+    def meta(self):
+        """
+        Devuelve (fecha inicial, lista de códigos, número de días), o None si el
+        archivo aún no existe.
+        """
+        if not os.path.exists(self.meta_file):
+            return None
+
+        with open(self.meta_file) as f:
+            meta = json.load(f)
+        start = pd.Timestamp(meta["start"])
+        stations = meta["stations"]
+        n_days = os.path.getsize(self.var_file(self.variables[0])) // (
+            8 * max(len(stations), 1)
+        )
+        return start, stations, n_days
+
+    def _write_meta(self, start, stations):
+        tmp = self.meta_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"start": start.strftime("%Y-%m-%d"), "stations": stations}, f)
+        os.replace(tmp, self.meta_file)
+
+    def _memmap(self, var, n_days, n_stations, mode="r"):
+        return np.memmap(
+            self.var_file(var), dtype="f8", mode=mode, shape=(n_days, n_stations)
+        )
+
+    def read(self, start, end, cods=None):
+        """
+        Devuelve un diccionario {variable: dataframe} con índice 'Fecha' (todos los
+        días entre start y end) y una columna por código de estación.
+
+        Parámetros:
+        start, end: fechas inicial y final (inclusive).
+        cods: códigos de las estaciones. Por defecto, todas las del archivo.
+        """
+        with file_lock(self.lock_file, shared=True):
+            return self._read(start, end, cods)
+
+    def _read(self, start, end, cods):
+        dates = pd.date_range(start=start, end=end, freq="D", name="Fecha")
+        meta = self.meta()
+        if meta is None:
+            cods = [] if cods is None else [str(c) for c in cods]
+            return {
+                var: pd.DataFrame(self.missing, index=dates, columns=cods)
+                for var in self.variables
+            }
+
+        first, stations, n_days = meta
+        cods = stations if cods is None else [str(c) for c in cods]
+
+        # Filas del archivo que caen dentro del rango pedido
+        r0 = min(max((dates[0] - first).days, 0), n_days)
+        r1 = min(max((dates[-1] - first).days + 1, 0), n_days)
+        stored = pd.date_range(start=first + pd.Timedelta(days=r0), periods=r1 - r0)
+
+        frames = {}
+        for var in self.variables:
+            if r1 > r0 and stations:
+                values = np.array(self._memmap(var, n_days, len(stations))[r0:r1])
+            else:
+                values = np.empty((0, len(stations)))
+            df = pd.DataFrame(values, index=stored, columns=stations)
+            frames[var] = df.reindex(
+                index=dates, columns=cods, fill_value=self.missing
+            ).rename_axis("Fecha")
+        return frames
+
+    def upsert(self, frames):
+        """
+        Agrega o actualiza datos en el archivo.
+
+        Parámetros:
+        frames: diccionario {variable: dataframe} con índice de fechas y una columna
+                por código de estación, como el que devuelve read().
+        """
+        with file_lock(self.lock_file):
+            self._upsert(frames)
+
+    def _upsert(self, frames):
+        frames = {var: frames[var] for var in self.variables}
+        ref = frames[self.variables[0]]
+        dates = pd.DatetimeIndex(ref.index).normalize()
+        cods = [str(c) for c in ref.columns]
+        if len(dates) == 0:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        meta = self.meta()
+        if meta is None:
+            start, stations, n_days = dates.min(), [], 0
+        else:
+            start, stations, n_days = meta
+
+        new_stations = [c for c in cods if c not in stations]
+        if meta is None or dates.min() < start or new_stations:
+            # Caso poco frecuente: se reescribe el archivo con las nuevas
+            # estaciones (columnas) o fechas anteriores (filas)
+            new_start = min(start, dates.min())
+            offset = (start - new_start).days
+            all_stations = stations + new_stations
+            for var in self.variables:
+                values = np.full(
+                    (offset + n_days, len(all_stations)), self.missing, dtype="f8"
+                )
+                if n_days and stations:
+                    values[offset:, : len(stations)] = self._memmap(
+                        var, n_days, len(stations)
+                    )
+                values.tofile(self.var_file(var))
+            self._write_meta(new_start, all_stations)
+            start, stations, n_days = new_start, all_stations, offset + n_days
+
+        # Agregando filas vacías al final hasta la última fecha
+        last = (dates.max() - start).days + 1
+        if last > n_days:
+            block = np.full((last - n_days, len(stations)), self.missing, dtype="f8")
+            for var in self.variables:
+                with open(self.var_file(var), "ab") as f:
+                    block.tofile(f)
+            n_days = last
+
+        rows = (dates - start).days.to_numpy()
+        cols = [stations.index(c) for c in cods]
+        for var in self.variables:
+            mm = self._memmap(var, n_days, len(stations), mode="r+")
+            mm[np.ix_(rows, cols)] = frames[var].to_numpy(dtype="f8")
+            mm.flush()
+            del mm
+
+
+def migrate_csv(series_path=config["paths"]["series"], archive=None):
+    """
+    Migración (una sola vez) de los csv de Data/Series/{provincia}/{cod}_{nombre}.csv
+    al archivo columnar.
+    """
+    archive = archive or StationArchive()
+    files = sorted(glob.glob(os.path.join(series_path, "*", "*.csv")))
+
+    series = {var: {} for var in StationArchive.variables}
+    for st_file in files:
+        cod = os.path.basename(st_file).split("_", 1)[0]
+        data = pd.read_csv(st_file, parse_dates=["Fecha"])
+        data = data.drop_duplicates("Fecha", keep="last").set_index("Fecha")
+        for var in StationArchive.variables:
+            series[var][cod] = data[var].astype(float)
+
+    if not files:
+        print("No se encontraron archivos csv.")
+        return
+
+    frames = {}
+    for var in StationArchive.variables:
+        df = pd.DataFrame(series[var])
+        dates = pd.date_range(start=df.index.min(), end=df.index.max(), freq="D")
+        frames[var] = df.reindex(dates).fillna(StationArchive.missing)
+
+    archive.upsert(frames)
+    print(f"{len(files)} archivos migrados a {archive.path}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--migrate", action="store_true")
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_csv()
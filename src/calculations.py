@@ -1,49 +1,58 @@
+import io
 import os
-from datetime import date, datetime, timedelta
+import threading
+from calendar import monthrange
+from datetime import date, datetime
+from functools import lru_cache
 from urllib.parse import urljoin
 
+import lxml.etree
+import lxml.html
 import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import urllib3
 import yaml
-from dash import dash_table
-from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.options import Options
+
+from src.archive import StationArchive
+from src.lazy import LazyModule
+from src.metrics import metrics
+
+# Módulos pesados que solo se usan al generar gráficos o al ingresar a la web;
+# se importan recién la primera vez que se usan (ver LazyModule)
+px = LazyModule("plotly.express")
+go = LazyModule("plotly.graph_objects")
+dash_table = LazyModule("dash.dash_table")
+requests = LazyModule("requests")
+urllib3 = LazyModule("urllib3")
 
 pd.set_option("mode.chained_assignment", None)
-urllib3.disable_warnings()
 
-# Cargando credenciales
-load_dotenv()
 
-username = os.getenv("USERNAME")
-password = os.getenv("PASSWORD")
+def credentials():
+    """
+    Devuelve (usuario, contraseña) de lvera, del archivo .env.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv("USERNAME"), os.getenv("PASSWORD")
+
 
 # Abrir el archivo YAML
 with open("config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
 
-def create_csv_if_not_exists(st_file):
-    if not os.path.exists(st_file):
-        # Crear DataFrame con los últimos 6 días en la columna 'Fecha'
-        fecha_actual = pd.Timestamp.now().date()
-        fechas = pd.date_range(end=fecha_actual, periods=45)
-        fechas_str = fechas.strftime("%Y-%m-%d")
-        df = pd.DataFrame({"Fecha": fechas_str, "Tmax": -999, "Tmin": -999, "PP": -999})
-
-        # Guardar DataFrame en un archivo CSV
-        df.to_csv(st_file, index=False)
-        print(f"Archivo {st_file} creado exitosamente.")
-
-
 def filter_stations():
-    ss = pd.read_excel(config["files"]["list"])
+    ss = stations.table()
     ss = ss[ss["Dash"] == 1]
+
+    # Cada código debe aparecer una sola vez (una columna por estación en el
+    # archivo de series); si se repite, se usa la primera fila
+    repeated = ss["Cod"].duplicated()
+    if repeated.any():
+        cods = ", ".join(ss.loc[repeated, "Cod"].unique())
+        print(f"Advertencia, códigos repetidos en la lista de estaciones: {cods}.")
+        ss = ss[~repeated]
     return ss
 
 
@@ -68,76 +77,268 @@ def handle_url(page_source):
         print("No se pudo crear el archivo.")
 
 
-def scrape_data(from_file=False):
-    if from_file:
-        print("Leyendo datos desde archivo guardado.")
-        f = open(config["files"]["url"])
-        rpc = pd.read_html(f.read(), header=[0, 1])[0]
-    else:
-        print("Leyendo datos desde la web lvera.")
+def resolve_sentinels(values):
+    """
+    Reemplaza los valores especiales de lvera: -999 (sin dato) por NaN y
+    -888 (traza de precipitación) por 0.01.
+    """
+    values = np.asarray(values, dtype=float)
+    values = np.where(values == -999, np.nan, values)
+    return np.where(values == -888, 0.01, values)
 
-        url = config["lvera_url"]
 
-        # Configurar las opciones para Firefox
-        options = Options()
-        options.headless = True
+@metrics.instrument
+class RpcTable:
+    """
+    Tabla del reporte diario de lvera (reporte_diario_rpc.php), leída fila por fila
+    con lxml directamente a arreglos de NumPy.
+
+    Atributos:
+    info: diccionario {columna: arreglo de textos} con las columnas descriptivas
+          (Cod., Cod_Ant., Departamento, ...). 'Cod.' sin ceros a la izquierda y
+          'Cod_Ant.' completado con ceros a 6 dígitos.
+    values: diccionario {'MIN'|'MAX'|'PP': arreglo float (estaciones x días)}.
+    days: diccionario {'MIN'|'MAX'|'PP': días del encabezado de cada columna}.
+
+    Parámetros:
+    page_source: código fuente de la página.
+    resolve: True para reemplazar -999 y -888 (ver resolve_sentinels).
+    """
+
+    def __init__(self, page_source, resolve=True):
+        if isinstance(page_source, str):
+            page_source = page_source.encode("utf-8")
+
+        rows = lxml.etree.iterparse(
+            io.BytesIO(page_source),
+            events=("end",),
+            tag="tr",
+            html=True,
+            encoding="utf-8",
+        )
+
+        header, groups, days = None, [], []
+        info, cells = [], []
+        try:
+            for _, tr in rows:
+                if days:
+                    # Filas de datos: el texto está en la celda o en su único hijo
+                    # (<p3>)
+                    texts = [
+                        ((td[0].text if len(td) else td.text) or "").strip()
+                        for td in tr.iterchildren("td")
+                    ]
+                else:
+                    texts = [
+                        "".join(td.itertext()).strip() for td in tr.iterchildren("td")
+                    ]
+
+                if header is None:
+                    # Primera fila: columnas descriptivas (rowspan) y variables
+                    # (colspan)
+                    header = [t for td, t in zip(tr, texts) if td.get("rowspan")]
+                    groups = [
+                        (t, int(td.get("colspan", 1)))
+                        for td, t in zip(tr, texts)
+                        if not td.get("rowspan")
+                    ]
+                elif not days:
+                    days = texts
+                elif texts:
+                    info.append(texts[: len(header)])
+                    cells.append(texts[len(header) :])
+                tr.clear()
+        except lxml.etree.XMLSyntaxError:
+            # Página vacía
+            header = None
+
+        # Igual que pd.read_html, si la página no tiene la tabla del reporte
+        if not header or "Cod." not in header or not days:
+            raise ValueError("No tables found")
+
+        info = np.array(info, dtype=object).reshape(-1, len(header))
+
+        # Todas las celdas de valores se convierten a float de una sola vez; si hay
+        # textos que no son números (como '' o 'S/D'), estos quedan como NaN
+        try:
+            data = np.array(cells, dtype=float)
+        except ValueError:
+            texts = np.array([c for row in cells for c in row], dtype=object)
+            data = pd.to_numeric(texts, errors="coerce").astype(float)
+        data = data.reshape(len(cells), -1)
+        if resolve:
+            data = resolve_sentinels(data)
+
+        header[5] = "Estacion"
+        self.info = {h: info[:, i] for i, h in enumerate(header)}
+        self.info["Cod."] = np.array(
+            [str(int(c)) if c.isdigit() else c for c in self.info["Cod."]], dtype=object
+        )
+        self.info["Cod_Ant."] = np.array(
+            ["%06d" % int(c) if c.isdigit() else c for c in self.info["Cod_Ant."]],
+            dtype=object,
+        )
+
+        self.values, self.days = {}, {}
+        start = 0
+        for var, span in groups:
+            self.values[var] = data[:, start : start + span]
+            self.days[var] = days[start : start + span]
+            start += span
+
+    def to_frame(self):
+        """
+        Devuelve la tabla como dataframe, con las columnas de valores nombradas
+        '{variable}_{día}' (por ejemplo 'MAX_09').
+        """
+        df = pd.DataFrame(self.info)
+        for var, values in self.values.items():
+            for j, day in enumerate(self.days[var]):
+                df[f"{var}_{day}"] = values[:, j]
+        return df
 
-        # Iniciar el navegador en modo headless
-        driver = webdriver.Firefox(options=options)
 
-        # Navegar a la página de inicio de sesión
-        driver.get(url)
+def report_url(url):
+    """
+    URL del reporte diario a partir de la URL de inicio de sesión.
+    """
+    return urljoin(url, "../../lvera/reporte_diario_rpc.php")
 
-        # Encontrar los campos de usuario y contraseña e ingresar los datos
-        driver.find_element(By.NAME, "usuario").send_keys(username)
-        driver.find_element(By.NAME, "password").send_keys(password)
 
-        # Encontrar el botón de inicio de sesión y hacer clic en él
-        driver.find_element(By.ID, "entrar").click()
+def fetch_page_requests(url):
+    """
+    Inicia sesión en lvera con una sesión HTTP (sin navegador) y devuelve el
+    código fuente del reporte diario. Las cookies de la sesión se mantienen
+    entre el inicio de sesión y la descarga del reporte.
+    """
+    username, password = credentials()
+    urllib3.disable_warnings()
+
+    with requests.Session() as session:
+        # Leyendo el formulario de inicio de sesión
+        response = session.get(url, timeout=60)
+        response.raise_for_status()
+        page = lxml.html.fromstring(response.text)
+        forms = [f for f in page.forms if "usuario" in f.inputs]
+        if not forms:
+            raise ValueError("No se encontró el formulario de inicio de sesión.")
+        form = forms[0]
+
+        # Enviando credenciales junto con los campos ocultos del formulario y el
+        # botón de envío (form_values() no incluye los botones)
+        fields = dict(form.form_values())
+        fields["usuario"] = username
+        fields["password"] = password
+        for el in form.iter("input", "button"):
+            kind = el.get("type", "submit" if el.tag == "button" else "text")
+            if kind.lower() == "submit" and el.get("name"):
+                fields[el.get("name")] = el.get("value", "")
+                break
+        action = urljoin(response.url, form.action or "")
         print("Iniciando sesión")
+        if (form.method or "GET").upper() == "POST":
+            response = session.post(action, data=fields, timeout=60)
+        else:
+            response = session.get(action, params=fields, timeout=60)
+        response.raise_for_status()
 
-        # Obtener el código fuente de la página
-        page_source = driver.page_source
+        # Obteniendo el reporte
+        response = session.get(report_url(url), timeout=60)
+        response.raise_for_status()
+        print("Accediendo a la página de lvera.")
 
-        # Construir la URL completa
-        new_url = urljoin(url, "../../lvera/reporte_diario_rpc.php")
+    return response.text
 
-        # Navegar a la nueva URL
-        try:
-            driver.get(new_url)
-            print("Accediendo a la página de lvera.")
-        except:
-            print("No se pudo acceder a la página de lvera.")
-            driver.quit()
 
-        # Esperar a que la página se cargue completamente
-        driver.implicitly_wait(10)
+def fetch_page_selenium(url):
+    """
+    Igual que fetch_page_requests, pero con Firefox en modo headless.
+    Requiere selenium y geckodriver.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.firefox.options import Options
 
-        # Obtener el código fuente de la nueva página
-        page_source = driver.page_source
+    username, password = credentials()
 
-        # Guardar el código fuente en un archivo HTML
-        handle_url(page_source)
+    # Configurar las opciones para Firefox
+    options = Options()
+    options.headless = True
+
+    # Iniciar el navegador en modo headless
+    driver = webdriver.Firefox(options=options)
+
+    # Navegar a la página de inicio de sesión
+    driver.get(url)
 
-        # Leyendo tabla
-        rpc = pd.read_html(page_source, header=[0, 1])[0]
+    # Encontrar los campos de usuario y contraseña e ingresar los datos
+    driver.find_element(By.NAME, "usuario").send_keys(username)
+    driver.find_element(By.NAME, "password").send_keys(password)
 
-        # Cerrar el navegador
-        print("Cerrando el navegador.")
+    # Encontrar el botón de inicio de sesión y hacer clic en él
+    driver.find_element(By.ID, "entrar").click()
+    print("Iniciando sesión")
+
+    # Navegar a la nueva URL
+    try:
+        driver.get(report_url(url))
+        print("Accediendo a la página de lvera.")
+    except:
+        print("No se pudo acceder a la página de lvera.")
         driver.quit()
+
+    # Esperar a que la página se cargue completamente
+    driver.implicitly_wait(10)
+
+    # Obtener el código fuente de la nueva página
+    page_source = driver.page_source
+
+    # Cerrar el navegador
+    print("Cerrando el navegador.")
+    driver.quit()
+    return page_source
+
+
+@metrics.timed()
+def scrape_data(from_file=False):
+    if from_file:
+        print("Leyendo datos desde archivo guardado.")
+        with open(config["files"]["url"], "rb") as f:
+            page_source = f.read()
+    else:
+        print("Leyendo datos desde la web lvera.")
+
+        url = config["lvera_url"]
+        if config.get("lvera_backend", "requests") == "selenium":
+            page_source = fetch_page_selenium(url)
+        else:
+            page_source = fetch_page_requests(url)
+
+        # Si no llegó la tabla del reporte (por ejemplo, si falló el inicio de
+        # sesión), no se reemplaza el último archivo guardado
+        if "Cod_Ant." not in page_source:
+            raise ValueError(
+                "No se encontró la tabla del reporte de lvera. "
+                "Revisar el usuario y la contraseña (.env)."
+            )
+
+        # Guardar el código fuente en un archivo HTML
+        handle_url(page_source)
+
+    # Leyendo tabla (los valores -999 y -888 se mantienen para el archivo de series)
+    rpc = RpcTable(page_source, resolve=False)
     return rpc
 
 
+@metrics.timed()
 def lvera(from_file=False):
     """
     Web scraping de la web lvera para extraer los últimos días con datos
     de las estaciones escogidas en file.
-    Devuelve un diccionario (data) que contiene todas las estaciones con los datos
-    de los últimos 45 días, para las 3 variables (Tmax, Tmin y PP).
+    Devuelve un diccionario (data) con un dataframe por variable (Tmax, Tmin y PP),
+    con los datos de los últimos 45 días (índice 'Fecha') y una columna por estación.
 
     Parámetros:
-    download_to_csv: Booleano para descargar datos de lvera a archivos csv.
-                        Es False por defecto.
     from_file: Booleano, por defecto ingresa a la página de lvera. Si se tiene
                 guardada la página en el archivo url y se quiere ingresar a través
                 de este, cambiar a True.
@@ -145,80 +346,229 @@ def lvera(from_file=False):
     ss = filter_stations()
     rpc = scrape_data(from_file)
 
-    # Arreglando encabezados de la tabla extraída
-    rpc.columns = [c[0] if c[0] == c[1] else "_".join(c) for c in rpc.columns.values]
-    rpc.columns.values[5] = (
-        "Estacion"  # Modificar directamente los valores de la columna
-    )
-
-    # Leyendo info de web y creando header
-    rpc["Cod_Ant."] = rpc["Cod_Ant."].map(lambda x: "%06d" % x)
-    rpc["Cod."] = rpc["Cod."].map(lambda x: "%d" % x)
-
-    # Seleccionando solo los que hay en la web
     ss["Cod"] = ss["Cod"].astype(str)
-    idd = ss["Cod"].isin(rpc["Cod."])
-    ss_rpc = ss[idd]
     v_rpc = ["MAX", "MIN", "PP"]
     v_df = ["Tmax", "Tmin", "PP"]
 
-    # loop para todas las estaciones
-    data_dict = {}
-    for i in range(len(ss)):
-        cod, prv, st = ss[["Cod", "Provincia", "Nombre"]].values[i]
+    # Leyendo los últimos 45 días de todas las estaciones desde el archivo de series
+    archive = StationArchive()
+    today = pd.Timestamp(date.today())
+    series = archive.read(today - pd.Timedelta(days=44), today, ss["Cod"])
+
+    # Códigos de la web (primera aparición) que están en la lista de estaciones
+    web_cods = pd.Index(rpc.info["Cod."])
+    first = ~web_cods.duplicated()
+    web_cods = web_cods[first]
+    cods = ss["Cod"][ss["Cod"].isin(web_cods)].unique()
+
+    # Asignando los datos de la web a todas las estaciones a la vez, por variable.
+    # Tmin llega hasta hoy; Tmax y PP hasta ayer.
+    for a, b in zip(v_rpc, v_df):
+        values = rpc.values[a][first]
+        ld = today if a == "MIN" else today - pd.Timedelta(days=1)
+        ff = pd.date_range(end=ld, periods=values.shape[1])
+        web = pd.DataFrame(values.T, index=ff, columns=web_cods)
+        series[b].loc[ff, cods] = web[cods].to_numpy()
+
+    # Actualizando el archivo de series con información del lvera
+    if config["export_to_archive"]:
+        archive.upsert(series)
+
+    # Nombrando columnas con el nombre de cada estación
+    data = {}
+    for b in v_df:
+        df = series[b].copy()
+        df.columns = ss["Nombre"].values
+        data[b] = df
+
+    return data
+
+
+@metrics.timed()
+def archive_data(start, end):
+    """
+    Lee del archivo de series los datos de las estaciones escogidas en file entre
+    start y end (sin consultar la web). Devuelve un diccionario con el mismo
+    formato que lvera(), con los valores -999 y -888 tal como están guardados.
+    """
+    ss = filter_stations()
+    ss["Cod"] = ss["Cod"].astype(str)
 
-        # Leyendo csv's con datos
-        st_file = os.path.join(config["paths"]["series"], f"{prv}/{cod}_{st}.csv")
+    series = StationArchive().read(start, end, ss["Cod"])
 
-        try:
-            data = pd.read_csv(st_file)
-        except:
-            create_csv_if_not_exists(st_file)
-            data = pd.read_csv(st_file)
+    data = {}
+    for var, df in series.items():
+        df = df.copy()
+        df.columns = ss["Nombre"].values
+        data[var] = df
+
+    return data
+
+
+class MonthStats:
+    """
+    Datos de un mes para una variable, calculados una sola vez por Dashboard:
+    valores diarios (día x estación), suma y número de datos por estación, y suma
+    por decadiaria.
+
+    Parámetros:
+    year, month: año y mes.
+    stations: nombres de las estaciones (columnas).
+    days: números de día (1 a 31) con datos; los demás días quedan sin datos.
+    values: arreglo (días x estaciones).
+    """
+
+    def __init__(self, year, month, stations, days, values):
+        self.year = year
+        self.month = month
+        self.stations = list(stations)
+        n_days = monthrange(year, month)[1]
+
+        self.values = np.full((n_days, len(self.stations)), np.nan)
+        self.values[np.asarray(days) - 1] = values
+        self.total = np.nansum(self.values, axis=0)
+        self.count = np.count_nonzero(~np.isnan(self.values), axis=0)
+
+        # Decadiaria (0, 1, 2) de cada día del mes
+        dec_of_day = np.minimum(np.arange(n_days) // 10, 2)
+        self.dec_total = np.array(
+            [np.nansum(self.values[dec_of_day == dec], axis=0) for dec in range(3)]
+        )
+
+    def mean(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(self.count > 0, self.total / self.count, np.nan)
+        return pd.Series(mean, index=self.stations)
 
-        data["Fecha"] = pd.to_datetime(data["Fecha"])
+    def sum(self):
+        return pd.Series(self.total, index=self.stations)
 
-        # Creando rango de fechas con última fecha de csv hasta día actual
-        fe = pd.date_range(
-            start=data["Fecha"].values[-1], end=date.today(), closed="right"
+    def dekads(self):
+        """
+        Suma por decadiaria (índice 'Decadiaria' 1, 2 y 3).
+        """
+        return pd.DataFrame(
+            self.dec_total,
+            index=pd.Index([1.0, 2.0, 3.0], name="Decadiaria"),
+            columns=self.stations,
         )
 
-        # Generando dataframe vacío con nuevo rango de fechas
-        nn = pd.DataFrame(
-            {
-                "Fecha": fe,
-                "Tmax": np.full(len(fe), -999),
-                "Tmin": np.full(len(fe), -999),
-                "PP": np.full(len(fe), -999),
-            }
+    def frame(self):
+        """
+        Valores diarios (índice: día en tipo string, columnas: estaciones).
+        """
+        days = [str(d) for d in range(1, len(self.values) + 1)]
+        return pd.DataFrame(self.values, index=days, columns=self.stations)
+
+
+@metrics.timed()
+def month_stats(df):
+    """
+    Divide la ventana de datos de una variable (índice de fechas, una columna por
+    estación) por meses. Devuelve un diccionario {mes: MonthStats} (la ventana
+    abarca menos de un año, así que el mes no se repite).
+    """
+    months = {}
+    keys = df.index.year * 100 + df.index.month
+    for key in np.unique(keys):
+        year, month = divmod(int(key), 100)
+        rows = df[keys == key]
+        months[month] = MonthStats(
+            year, month, df.columns, rows.index.day, rows.to_numpy(dtype=float)
         )
+    return months
+
+
+@lru_cache(maxsize=None)
+def map_layout(mapbox_token):
+    """
+    Plantilla base (tamaño, márgenes y mapbox centrado en Cajamarca) común a todos
+    los mapas. Se arma una sola vez por token; go.Figure la copia en cada mapa.
+    """
+    return go.Layout(
+        height=500,
+        width=600,
+        hovermode="closest",
+        autosize=False,
+        mapbox=dict(
+            accesstoken=mapbox_token,
+            bearing=0,
+            center=dict(lat=-7.16, lon=-78.49),
+            style="light",
+            pitch=0,
+            zoom=8,
+        ),
+        margin=dict(t=0, b=0, l=0, r=0),
+    )
 
-        # Uniendo data de csv's con nuevo dataframe
-        df = pd.concat([data, nn], ignore_index=True)
-
-        if st in list(ss_rpc.Nombre):
-            # Bucle para extraer data de web de cada columna y asignarlo al dataframe
-            for a, b in zip(v_rpc, v_df):
-                vc = [x for x in rpc.columns if a in x]
-                ld = date.today() - timedelta(days=1)
-                if a == "MIN":
-                    ld = date.today()
-                ff = pd.date_range(end=ld, periods=len(vc))
-                df.loc[df["Fecha"].isin(ff), b] = (
-                    rpc.loc[rpc["Cod."] == cod, vc].values[0].tolist()
-                )
 
-        data_dict[st] = df.tail(45)
+@metrics.timed()
+def station_map(
+    mapbox_token,
+    names,
+    lat,
+    lon,
+    hover,
+    color,
+    size,
+    size_max,
+    opacity=0.9,
+    colorscale=None,
+    color_title=None,
+):
+    """
+    Mapa de estaciones con un solo trazo go.Scattermapbox.
+
+    Parámetros:
+    mapbox_token: key de mapbox.
+    names, lat, lon: nombre y coordenadas de cada estación.
+    hover: diccionario {etiqueta: valores} a mostrar al pasar el cursor.
+    color: valores (con colorscale) o colores de cada marcador.
+    size: tamaño (área) de cada marcador, o uno solo para todos.
+    size_max: diámetro en pixeles del marcador más grande.
+    colorscale: escala de colores para valores continuos.
+    color_title: título de la barra de colores.
+    """
+    size = np.broadcast_to(np.asarray(size, dtype=float), np.shape(lat))
+    max_size = np.nanmax(size) if size.size else 1.0
+
+    marker = dict(
+        color=np.asarray(color),
+        opacity=opacity,
+        size=size,
+        sizemode="area",
+        sizeref=(max_size or 1.0) / size_max**2,
+    )
+    if colorscale is not None:
+        marker.update(
+            colorscale=colorscale,
+            showscale=True,
+            colorbar=dict(title=dict(text=color_title)),
+        )
 
-        # Actualizando bases de datos con información del lvera
-        if config["export_to_csv"]:
-            # print("Descargando datos de web lvera a archivos locales..")
-            df.to_csv(st_file, index=False)
-            # print("Archivos actualizados.")
+    labels = list(hover)
+    hovertemplate = (
+        "<b>%{hovertext}</b><br><br>"
+        + "<br>".join(f"{k}=%{{customdata[{i}]}}" for i, k in enumerate(labels))
+        + "<extra></extra>"
+    )
 
-    return data_dict
+    trace = go.Scattermapbox(
+        lat=np.asarray(lat, dtype=float),
+        lon=np.asarray(lon, dtype=float),
+        mode="markers",
+        marker=marker,
+        hovertext=np.asarray(names),
+        customdata=np.column_stack([np.asarray(hover[k]) for k in labels]),
+        hovertemplate=hovertemplate,
+        showlegend=False,
+        name="",
+    )
+    metrics.count("figures_built")
+    return go.Figure(data=[trace], layout=map_layout(mapbox_token))
 
 
+@metrics.instrument
 class LastData:
     def __init__(self, last_data_df):
         self.last_data_df = last_data_df
@@ -310,6 +660,7 @@ class LastData:
             xaxis_tickangle=-45,
             height=600,
         )
+        metrics.count("figures_built")
         last_data_fig = go.Figure(data=[tmx, tmn, ppp], layout=layout)
 
         return last_data_fig
@@ -318,86 +669,45 @@ class LastData:
         var = var.upper()
         df = self.last_data_df[["Lat", "Lon", var]]
         df = df[~df.index.isin(config["plu_st"])]
-        df["size"] = 10
 
         if var == "TMIN":
-            opt = {"Lat": False, "Lon": False, "size": False, "TMIN": True}
             color_scale = px.colors.sequential.ice
         elif var == "TMAX":
-            opt = {"Lat": False, "Lon": False, "size": False, "TMAX": True}
             color_scale = px.colors.sequential.YlOrRd
         else:
             ValueError("Variable no soportada.")
 
-        mapbx = px.scatter_mapbox(
-            df,
-            lat="Lat",
-            lon="Lon",
-            hover_name=df.index,
-            hover_data=opt,
-            opacity=0.9,
-            color=var,
-            color_continuous_scale=color_scale,
-            size=df["size"],
+        return station_map(
+            mapbox_token,
+            df.index,
+            df["Lat"],
+            df["Lon"],
+            hover={var: df[var]},
+            color=df[var],
+            size=10,
             size_max=17,
-            zoom=8,
-            height=500,
-            width=600,
+            colorscale=color_scale,
+            color_title=var,
         )
 
-        mapbx.update_layout(
-            hovermode="closest",
-            autosize=False,
-            mapbox=dict(
-                accesstoken=mapbox_token,
-                bearing=0,
-                center=go.layout.mapbox.Center(lat=-7.16, lon=-78.49),
-                style="light",
-                pitch=0,
-                zoom=8,
-            ),
-            margin=dict(t=0, b=0, l=0, r=0),
-        )
-
-        return mapbx
-
     def map_pp(self, mapbox_token):
-        df = self.last_data_df[["Lat", "Lon", "PP"]]
-        df.dropna(inplace=True)
-        opt = {"Lat": False, "Lon": False, "PP": True}
-
-        mapbx = px.scatter_mapbox(
-            df,
-            lat="Lat",
-            lon="Lon",
-            hover_name=df.index,
-            hover_data=opt,
-            opacity=0.9,
-            color="PP",
-            color_continuous_scale=px.colors.sequential.Viridis_r,
-            size="PP",
+        df = self.last_data_df[["Lat", "Lon", "PP"]].dropna()
+
+        return station_map(
+            mapbox_token,
+            df.index,
+            df["Lat"],
+            df["Lon"],
+            hover={"PP": df["PP"]},
+            color=df["PP"],
+            size=df["PP"],
             size_max=30,
-            zoom=8,
-            height=500,
-            width=600,
+            colorscale=px.colors.sequential.Viridis_r,
+            color_title="PP",
         )
 
-        mapbx.update_layout(
-            hovermode="closest",
-            autosize=False,
-            mapbox=dict(
-                accesstoken=mapbox_token,
-                bearing=0,
-                center=go.layout.mapbox.Center(lat=-7.16, lon=-78.49),
-                style="light",
-                pitch=0,
-                zoom=8,
-            ),
-            margin=dict(t=0, b=0, l=0, r=0),
-        )
-        return mapbx
-
 
+@metrics.timed()
 def series(var, df, this_month, day):
     """
     Devuelve gráficos de series de tiempo para las temperaturas extremas,
@@ -451,6 +761,7 @@ def series(var, df, this_month, day):
             height=650,
         )
 
+        metrics.count("figures_built")
         fig = go.Figure(data=ss, layout=layout)
 
     elif var == "pp":
@@ -482,6 +793,7 @@ def series(var, df, this_month, day):
             xaxis_tickangle=0,
         )
 
+        metrics.count("figures_built")
         fig = go.Figure(data=pp_bars, layout=layout)
     else:
         ValueError("Variable no soportada.")
@@ -489,6 +801,76 @@ def series(var, df, this_month, day):
     return fig
 
 
+@metrics.instrument
+class ThresholdStore:
+    """
+    Almacén de umbrales compartido por todo el proceso. Cada libro de Excel
+    (PRC_{VAR}.xlsx, norm.xlsx y decadiarias.xlsx) se lee una sola vez con todas
+    sus hojas y se vuelve a leer solo si cambia su fecha de modificación.
+
+    Parámetros:
+    umb_path: carpeta con los archivos de percentiles PRC_{VAR}.xlsx.
+    file_w_normals: archivo 'norm' con los valores de las normales climáticas.
+    dec_file: archivo con las normales por decadiaria.
+    """
+
+    def __init__(self, umb_path, file_w_normals, dec_file):
+        self.umb_path = umb_path
+        self.file_w_normals = file_w_normals
+        self.dec_file = dec_file
+        self._books = {}
+        self._lock = threading.Lock()
+
+    def book(self, path):
+        """
+        Devuelve un diccionario {hoja: dataframe} con todas las hojas del archivo.
+        """
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._books.get(path)
+            if cached is None or cached[0] != mtime:
+                metrics.count("excel_reads")
+                cached = (mtime, pd.read_excel(path, sheet_name=None))
+                self._books[path] = cached
+        return cached[1]
+
+    def get(self, var, percentile, month=None, file=None):
+        """
+        Devuelve los umbrales de la variable para el mes indicado (todos los meses
+        si month es None). El resultado es una copia, se puede modificar libremente.
+
+        Parámetros:
+        var: 'tmax', 'tmin' o 'pp'.
+        percentile: 'p1', 'p5', 'p10', 'p90', 'p95', 'p99', 'normal' o 'dec'.
+        month: número de mes.
+        file: archivo alternativo al configurado para el umbral solicitado.
+        """
+        var = var.upper()
+        if percentile == "normal":
+            sheets = self.book(file or self.file_w_normals)
+            df = sheets[var]
+        elif percentile == "dec":
+            sheets = self.book(file or self.dec_file)
+            df = next(iter(sheets.values()))
+        elif percentile.startswith("p"):
+            prc_file = file or os.path.join(self.umb_path, f"PRC_{var}.xlsx")
+            df = self.book(prc_file)[f"prc_{percentile[1:]}"]
+        else:
+            raise ValueError("Umbral no soportado.")
+
+        if month is not None:
+            return df[df["MES"] == month]
+        return df.copy()
+
+
+thresholds = ThresholdStore(
+    config["paths"]["umbrales"],
+    config["files"]["normals"],
+    config["files"]["decadiarias"],
+)
+
+
+@metrics.instrument
 class Anomalies:
     """
     Esta clase calcula las anomalías, genera gráficos de barras y mapas,
@@ -510,7 +892,9 @@ class Anomalies:
         self.file_w_normals = file_w_normals
 
     def calculate_anomalies(self):
-        normal_file = pd.read_excel(self.file_w_normals, sheet_name=self.var)
+        normal_file = thresholds.get(
+            self.var, "normal", self.this_month, file=self.file_w_normals
+        )
         if self.var == "TMAX" or self.var == "TMIN":
             ee = self.df_mean.index  # Lista completa de estaciones
             idd = ee.isin(
@@ -605,6 +989,7 @@ class Anomalies:
             xaxis_tickangle=-45,
         )
 
+        metrics.count("figures_built")
         fig = go.Figure(data=anom_bars, layout=layout)
 
         return fig
@@ -653,43 +1038,48 @@ class Anomalies:
             df_map["anomaly"], bins=limits, labels=colors, right=False
         )
         df_map["Color"] = df_map["Color"].astype(str)
-        # Añadiendo opciones para los marcadores del mapa
-        df_map["size"] = 10
-        opt = {"Lat": False, "Lon": False, "size": False, "anomaly": True}
-
-        mapbx = px.scatter_mapbox(
-            df_map,
-            lat="Lat",
-            lon="Lon",
-            hover_name="Estaciones",
-            hover_data=opt,
-            opacity=0.9,
+
+        return station_map(
+            mapbox_token,
+            df_map["Estaciones"],
+            df_map["Lat"],
+            df_map["Lon"],
+            hover={"anomaly": df_map["anomaly"]},
             color=df_map["Color"],
-            color_discrete_map="identity",
-            size=df_map["size"],
+            size=10,
             size_max=27,
-            zoom=8,
-            height=500,
-            width=600,
         )
 
-        mapbx.update_layout(
-            hovermode="closest",
-            autosize=False,
-            mapbox=dict(
-                accesstoken=mapbox_token,
-                bearing=0,
-                center=go.layout.mapbox.Center(lat=-7.16, lon=-78.49),
-                style="light",
-                pitch=0,
-                zoom=8,
-            ),
-            margin=dict(t=0, b=0, l=0, r=0),
-        )
 
-        return mapbx
+@metrics.timed()
+def classify(var, values, limits):
+    """
+    Clasifica a la vez todas las celdas de una matriz (estación x día) contra los
+    umbrales de cada estación. La categoría es el número de umbrales alcanzados:
+    tmin: 4 (<= p1), 3 (<= p5), 2 (<= p10), 1 (<= normal), 0 (resto).
+    tmax y pp: 3 (>= p99), 2 (>= p95), 1 (>= p90), 0 (resto).
+    Las celdas sin datos quedan con -1.
 
+    Parámetros:
+    var: 'tmax', 'tmin' o 'pp'.
+    values: arreglo (estaciones x días).
+    limits: lista de arreglos con un umbral por estación (normal, p10, p5 y p1 para
+            tmin; p90, p95 y p99 para tmax y pp).
+    """
+    values = np.asarray(values, dtype=float)
+    limits = [np.asarray(umb, dtype=float).reshape(-1, 1) for umb in limits]
+
+    if var.lower() == "tmin":
+        reached = [values <= umb for umb in limits]
+    else:
+        reached = [values >= umb for umb in limits]
 
+    categories = np.sum(reached, axis=0, dtype=int)
+    categories[np.isnan(values)] = -1
+    return categories
+
+
+@metrics.instrument
 class Clasification:
     """
     Esta clase genera las tablas con la caracterización de las variables de interés
@@ -701,17 +1091,43 @@ class Clasification:
     this_month: mes anterior si es el día 1 del mes, mes actual para los demás días.
     this_month_days_list: Lista con los días (tipo string) del mes anterior si es el día 1,
                             o del mes actual si es cualquier otro día.
+    month_values: valores diarios del mes ya acumulados (MonthStats.frame()).
+                  Si no se indica, se toman de df.
     """
 
-    def __init__(self, var, df, this_month, this_month_days_list, umb_path):
+    # Colores por categoría (ver classify)
+    colors = {
+        "tmin": {
+            4: "#ff0000",  # rojo
+            3: "#ffc000",  # naranja
+            2: "#ffff00",  # amarillo
+            1: "#a7ea52",  # verde
+            -1: "#d9d9d9",  # plomo (para vacíos)
+        },
+        "tmax": {
+            1: "#ffff00",  # amarillo
+            2: "#ffc000",  # naranja
+            3: "#ff0000",  # rojo
+            -1: "#d9d9d9",  # plomo (para vacíos)
+        },
+    }
+    colors["pp"] = colors["tmax"]
+
+    def __init__(
+        self, var, df, this_month, this_month_days_list, umb_path, month_values=None
+    ):
         self.var = var
         self.df = df
         self.this_month = this_month
         self.this_month_days_list = this_month_days_list
         self.umb_path = umb_path
+        self.month_values = month_values
         self.get_percentile()
         self.prep_dataframe()
 
+        values = self.prep_df[self.this_month_days_list].to_numpy(dtype=float)
+        self.categories = classify(self.var, values, self.limits())
+
     def get_percentile(self):
         """
         Selecciona los percentiles y normales climáticas de la variable escogida,
@@ -719,27 +1135,21 @@ class Clasification:
         dichos umbrales.
         """
         var = self.var.upper()
-        prc_file = os.path.join(config["paths"]["umbrales"], f"PRC_{var}.xlsx")
         if var == "TMIN":
-            norm_file = config["files"]["normals"]
-
-            prc_1 = pd.read_excel(prc_file, sheet_name="prc_1")
-            prc_5 = pd.read_excel(prc_file, sheet_name="prc_5")
-            prc_10 = pd.read_excel(prc_file, sheet_name="prc_10")
-            normal = pd.read_excel(norm_file, sheet_name=var)
+            prc_1 = thresholds.get(var, "p1", self.this_month)
+            prc_5 = thresholds.get(var, "p5", self.this_month)
+            prc_10 = thresholds.get(var, "p10", self.this_month)
+            normal = thresholds.get(var, "normal", self.this_month)
 
             ee = self.df.columns
             idd = ee.isin(prc_1.columns[1:])
             df_f = self.df.loc[:, ee[idd]]
             df_f = df_f[df_f.index.month == self.this_month]
 
-            p1 = prc_1[(prc_1["MES"] == self.this_month)]
-            p1 = p1[ee[idd]]
-            p5 = prc_5[(prc_5["MES"] == self.this_month)]
-            p5 = p5[ee[idd]]
-            p10 = prc_10[(prc_10["MES"] == self.this_month)]
-            p10 = p10[ee[idd]]
-            normal_f = normal.loc[normal["MES"] == self.this_month, ee[idd]]
+            p1 = prc_1[ee[idd]]
+            p5 = prc_5[ee[idd]]
+            p10 = prc_10[ee[idd]]
+            normal_f = normal[ee[idd]]
 
             self.df_f = df_f
             self.normal_f = normal_f
@@ -747,21 +1157,18 @@ class Clasification:
             self.p5 = p5
             self.p10 = p10
         else:
-            prc_90 = pd.read_excel(prc_file, sheet_name="prc_90")
-            prc_95 = pd.read_excel(prc_file, sheet_name="prc_95")
-            prc_99 = pd.read_excel(prc_file, sheet_name="prc_99")
+            prc_90 = thresholds.get(var, "p90", self.this_month)
+            prc_95 = thresholds.get(var, "p95", self.this_month)
+            prc_99 = thresholds.get(var, "p99", self.this_month)
 
             ee = self.df.columns
             idd = ee.isin(prc_90.columns[1:])
             df_f = self.df.loc[:, ee[idd]]
             df_f = df_f[df_f.index.month == self.this_month]
 
-            p90 = prc_90[(prc_90["MES"] == self.this_month)]
-            p90 = p90[ee[idd]]
-            p95 = prc_95[(prc_95["MES"] == self.this_month)]
-            p95 = p95[ee[idd]]
-            p99 = prc_99[(prc_99["MES"] == self.this_month)]
-            p99 = p99[ee[idd]]
+            p90 = prc_90[ee[idd]]
+            p95 = prc_95[ee[idd]]
+            p99 = prc_99[ee[idd]]
 
             self.df_f = df_f
             self.p90 = p90
@@ -773,101 +1180,70 @@ class Clasification:
         Este método prepara el dataframe generado en get_percentile() para añadir
         estilos.
         """
-        prep_df = pd.DataFrame(
-            index=self.this_month_days_list, columns=self.df_f.columns, data=np.NaN
-        )
+        if self.month_values is not None:
+            prep_df = self.month_values.loc[
+                self.this_month_days_list, self.df_f.columns
+            ].T
+        else:
+            prep_df = pd.DataFrame(
+                index=self.this_month_days_list, columns=self.df_f.columns, data=np.NaN
+            )
 
-        for i in range(len(self.df_f)):
-            prep_df.iloc[i] = self.df_f.values[i]
-        prep_df = prep_df.T
+            for i in range(len(self.df_f)):
+                prep_df.iloc[i] = self.df_f.values[i]
+            prep_df = prep_df.T
 
         prep_df = prep_df.rename_axis("ESTACIONES").reset_index()
         prep_df["id"] = prep_df.index
 
         self.prep_df = prep_df
 
-    def style_tmin(self):
-        numeric_columns = (
-            self.prep_df.select_dtypes("number").drop(["id"], axis=1).columns
-        )
-        styles = []
-
-        for i in range(len(self.prep_df)):
-            row = self.prep_df.loc[i, numeric_columns]
-            ranges = [
-                self.p1.iloc[0, i],
-                self.p5.iloc[0, i],
-                self.p10.iloc[0, i],
-                self.normal_f.iloc[0, i],
-            ]
-
-            for j in range(len(self.prep_df.columns) - 2):
-                style = {
-                    "if": {
-                        "filter_query": "{{id}} = {}".format(i),
-                        "column_id": row.keys()[j],
-                    },
-                    "backgroundColor": "#ffffff",
-                    "color": "black",
-                }
-
-                if row[j] <= ranges[0]:
-                    style["backgroundColor"] = "#ff0000"
-                elif row[j] <= ranges[1]:
-                    style["backgroundColor"] = "#ffc000"
-                elif row[j] <= ranges[2]:
-                    style["backgroundColor"] = "#ffff00"
-                elif row[j] <= ranges[3]:
-                    style["backgroundColor"] = "#a7ea52"
-                elif np.isnan(row[j]):
-                    style["backgroundColor"] = "#d9d9d9"
-
-                styles.append(style)
+    def limits(self):
+        """
+        Umbrales de cada estación (una fila por estación de prep_df) en el orden que
+        usa classify().
+        """
+        if self.var.upper() == "TMIN":
+            limits = [self.normal_f, self.p10, self.p5, self.p1]
+        else:
+            limits = [self.p90, self.p95, self.p99]
+        return [umb.to_numpy(dtype=float).reshape(-1) for umb in limits]
 
-        cc = dash_table.DataTable(
-            data=self.prep_df.to_dict("records"),
-            sort_action="native",
-            columns=[{"name": i, "id": i} for i in self.prep_df.columns if i != "id"],
-            style_data_conditional=styles,
-            style_data={"height": "auto"},
-            style_cell_conditional=[{"textAlign": "center"}],
-        )
+    def styled_table(self, colors):
+        """
+        Genera la tabla con colores. La categoría de cada celda se guarda en una
+        columna oculta 'cat_{día}', de modo que basta una regla de estilo por cada
+        combinación (día, categoría) en lugar de una por celda.
 
-        return cc
+        Parámetros:
+        colors: diccionario {categoría: color}.
+        """
+        categories = self.categories
+        data = self.prep_df.copy()
 
-    def style_tmax(self):
-        numeric_columns = (
-            self.prep_df.select_dtypes("number").drop(["id"], axis=1).columns
-        )
-        styles = []
-
-        for i in range(len(self.prep_df)):
-            row = self.prep_df.loc[i, numeric_columns]
-            ranges = [self.p90.iloc[0, i], self.p95.iloc[0, i], self.p99.iloc[0, i]]
-
-            for j in range(len(self.prep_df.columns) - 2):
-                style = {
-                    "if": {
-                        "filter_query": "{{id}} = {}".format(i),
-                        "column_id": row.keys()[j],
-                    },
-                    "backgroundColor": "#ffffff",
-                    "color": "black",
-                }
-
-                if row[j] >= ranges[0] and row[j] < ranges[1]:
-                    style["backgroundColor"] = "#ffff00"  # amarillo
-                elif row[j] >= ranges[1] and row[j] < ranges[2]:
-                    style["backgroundColor"] = "#ffc000"  # naranja
-                elif row[j] >= ranges[2]:
-                    style["backgroundColor"] = "#ff0000"  # rojo
-                elif np.isnan(row[j]):
-                    style["backgroundColor"] = "#d9d9d9"  # plomo (para vacíos)
-
-                styles.append(style)
+        styles = [
+            {
+                "if": {"column_id": self.this_month_days_list},
+                "backgroundColor": "#ffffff",
+                "color": "black",
+            }
+        ]
+        for j, day in enumerate(self.this_month_days_list):
+            data[f"cat_{day}"] = categories[:, j]
+            for cat in np.unique(categories[:, j]):
+                if cat in colors:
+                    styles.append(
+                        {
+                            "if": {
+                                "filter_query": "{{cat_{}}} = {}".format(day, cat),
+                                "column_id": day,
+                            },
+                            "backgroundColor": colors[cat],
+                        }
+                    )
 
         cc = dash_table.DataTable(
-            data=self.prep_df.to_dict("records"),
+            data=data.to_dict("records"),
             sort_action="native",
             columns=[{"name": i, "id": i} for i in self.prep_df.columns if i != "id"],
             style_data_conditional=styles,
@@ -877,10 +1253,17 @@ class Clasification:
 
         return cc
 
+    def style_tmin(self):
+        return self.styled_table(self.colors["tmin"])
+
+    def style_tmax(self):
+        return self.styled_table(self.colors["tmax"])
+
     def style_pp(self):
-        return self.style_tmax()
+        return self.styled_table(self.colors["pp"])
 
 
+@metrics.instrument
 class Decadiarias:
     """
     Esta clase calcula las anomalías de precipitación por decadiarias y
@@ -891,14 +1274,17 @@ class Decadiarias:
     this_month: mes anterior si es el día 1 del mes, mes actual para los demás días.
     file: ruta de archivo 'lista' con todas las estaciones.
     dec_file: ruta de archivo con decadiarias.
+    dec_sums: suma por decadiaria ya acumulada (MonthStats.dekads()).
+              Si no se indica, se calcula desde pp.
     """
 
-    def __init__(self, pp, this_month, file, dec_file):
+    def __init__(self, pp, this_month, file, dec_file, dec_sums=None):
         self.pp = pp
         self.this_month = this_month
         self.file = file
-        self.dc = pd.read_excel(dec_file)
-        self.df_prep()
+        self.dec_file = dec_file
+        self.dec_sums = dec_sums
+        self.sum_df_f, self.dc_f = self.df_prep()
 
     def df_prep(self):
         """
@@ -907,20 +1293,23 @@ class Decadiarias:
         Retorna un dataframe con la suma de las precipitaciones en las 3 decadiarias del mes
         y las decadiarias adecuadas de acuerdo al mes.
         """
-        # Filtrando valores del mes actual
-        df = self.pp[self.pp.index.month == self.this_month]
-        # Creando dataframe de precipitación y añadiendo columna con nro de decadiaria
-        df.insert(0, "Decadiaria", np.nan)
+        if self.dec_sums is not None:
+            sum_df = self.dec_sums.copy()
+        else:
+            # Filtrando valores del mes actual
+            df = self.pp[self.pp.index.month == self.this_month]
+            # Creando dataframe de precipitación y añadiendo columna con nro de decadiaria
+            df.insert(0, "Decadiaria", np.nan)
 
-        df.loc[df.index.day <= 10, "Decadiaria"] = 1
-        df.loc[(df.index.day > 10) & (df.index.day <= 20), "Decadiaria"] = 2
-        df.loc[df.index.day > 20, "Decadiaria"] = 3
+            df.loc[df.index.day <= 10, "Decadiaria"] = 1
+            df.loc[(df.index.day > 10) & (df.index.day <= 20), "Decadiaria"] = 2
+            df.loc[df.index.day > 20, "Decadiaria"] = 3
 
-        # Calculando suma de valores por decadiaria
-        sum_df = df.groupby(pd.Grouper("Decadiaria")).sum()
+            # Calculando suma de valores por decadiaria
+            sum_df = df.groupby(pd.Grouper("Decadiaria")).sum()
 
         # Escogiendo decadiarias del mes actual:
-        dc = self.dc[self.dc["MES"] == self.this_month]
+        dc = thresholds.get("pp", "dec", self.this_month, file=self.dec_file)
 
         # Omitiendo estaciones con normales iguales a 0
         self.columns_to_drop = []
@@ -944,7 +1333,7 @@ class Decadiarias:
         """
         Calcula las anomalías por decadiaria y asigna colores de acuerdo a su valor.
         """
-        sum_df_f, dc_f = self.df_prep()
+        sum_df_f, dc_f = self.sum_df_f, self.dc_f
 
         # Creando nuevo array con la forma de dc_f
         shape = dc_f.shape
@@ -973,16 +1362,19 @@ class Decadiarias:
             "#0b2c7b",
         ]
 
-        def assign_color(value):
-            if value == -100:
-                return "#c2523c"
-            else:
-                return pd.cut([value], bins=val, labels=cols)[0]
+        def assign_color(values):
+            # Intervalos cerrados por la derecha; -100 cae en el primer color
+            values = values.to_numpy(dtype=float)
+            bins = np.searchsorted(val, values, side="left") - 1
+            bins = np.clip(bins, 0, len(cols) - 1)
+            colors = np.array(cols, dtype=object)[bins]
+            colors[np.isnan(values)] = np.nan
+            return colors
 
         # Aplicar la función a las columnas correspondientes
-        dec_df.loc[:, "C1"] = dec_df.loc[:, "1ra-Dec"].apply(assign_color)
-        dec_df.loc[:, "C2"] = dec_df.loc[:, "2da-Dec"].apply(assign_color)
-        dec_df.loc[:, "C3"] = dec_df.loc[:, "3ra-Dec"].apply(assign_color)
+        dec_df.loc[:, "C1"] = assign_color(dec_df.loc[:, "1ra-Dec"])
+        dec_df.loc[:, "C2"] = assign_color(dec_df.loc[:, "2da-Dec"])
+        dec_df.loc[:, "C3"] = assign_color(dec_df.loc[:, "3ra-Dec"])
 
         # Añadiendo coordenadas
         dec_df = Utils(dec_df, self.file).add_lat_lon()
@@ -991,81 +1383,98 @@ class Decadiarias:
 
         return dec
 
-    def maps(self, d, mapbox_token):
+    def maps(self, d, mapbox_token, dec=None):
         """
         Genera los mapas de anomalías por decadiarias usando mapbox.
 
         Parámetros:
         d: decadiaria a solicitar ('d1', 'd2', 'd3')
         mapbox_token: key de mapbox.
+        dec: dataframe de calculate_anom(), si ya fue calculado.
         """
-        dec = self.calculate_anom()
-        dec.loc[:, "size"] = 10
-
-        if d == "d1":
-            opt = {
-                "Lat": False,
-                "Lon": False,
-                "size": False,
-                "1ra-Dec": True,
-                "2da-Dec": False,
-                "3ra-Dec": False,
-            }
-            color_col = "C1"
-        elif d == "d2":
-            opt = {
-                "Lat": False,
-                "Lon": False,
-                "size": False,
-                "1ra-Dec": False,
-                "2da-Dec": True,
-                "3ra-Dec": False,
-            }
-            color_col = "C2"
-        else:
-            opt = {
-                "Lat": False,
-                "Lon": False,
-                "size": False,
-                "1ra-Dec": False,
-                "2da-Dec": False,
-                "3ra-Dec": True,
-            }
-            color_col = "C3"
-
-        mapbx_dc = px.scatter_mapbox(
-            dec,
-            lat="Lat",
-            lon="Lon",
-            hover_name="Estaciones",
-            hover_data=opt,
-            opacity=1,
+        dec = self.calculate_anom() if dec is None else dec
+
+        value_col, color_col = {
+            "d1": ("1ra-Dec", "C1"),
+            "d2": ("2da-Dec", "C2"),
+            "d3": ("3ra-Dec", "C3"),
+        }.get(d, ("3ra-Dec", "C3"))
+
+        # Estaciones sin anomalía (sin color) no se muestran
+        dec = dec[dec[color_col].notna()]
+
+        return station_map(
+            mapbox_token,
+            dec["Estaciones"],
+            dec["Lat"],
+            dec["Lon"],
+            hover={value_col: dec[value_col]},
             color=dec[color_col],
-            color_discrete_map="identity",
-            size=dec["size"],
+            size=10,
             size_max=27,
-            zoom=8,
-            height=500,
-            width=600,
+            opacity=1,
         )
 
-        mapbx_dc.update_layout(
-            hovermode="closest",
-            autosize=False,
-            mapbox=dict(
-                accesstoken=mapbox_token,
-                bearing=0,
-                center=go.layout.mapbox.Center(lat=-7.16, lon=-78.49),
-                style="light",
-                pitch=0,
-                zoom=8,
-            ),
-            margin=dict(t=0, b=0, l=0, r=0),
-        )
+    def maps_all(self, mapbox_token):
+        """
+        Genera los mapas de las 3 decadiarias a partir de un solo cálculo de
+        anomalías y coordenadas.
+
+        Parámetros:
+        mapbox_token: key de mapbox.
+        """
+        dec = self.calculate_anom()
+        return tuple(self.maps(d, mapbox_token, dec) for d in ["d1", "d2", "d3"])
 
-        return mapbx_dc
 
+@metrics.instrument
+class StationRegistry:
+    """
+    Registro de estaciones (archivo 'lista') compartido por todo el proceso.
+    El archivo se lee una sola vez y se indexa por nombre; se vuelve a leer solo
+    si cambia su fecha de modificación.
 
+    Parámetros:
+    file: archivo 'lista' con todas las estaciones.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _load(self, file=None):
+        file = file or self.file
+        mtime = os.path.getmtime(file)
+        with self._lock:
+            cached = self._tables.get(file)
+            if cached is None or cached[0] != mtime:
+                metrics.count("excel_reads")
+                ss = pd.read_excel(file)
+                ss["Cod"] = ss["Cod"].astype(str)
+                by_name = ss.drop_duplicates("Nombre").set_index("Nombre", drop=False)
+                cached = (mtime, ss, by_name)
+                self._tables[file] = cached
+        return cached
+
+    def table(self, file=None):
+        """
+        Devuelve una copia del archivo de estaciones tal como fue leído.
+        """
+        return self._load(file)[1].copy()
+
+    def by_name(self, names, columns, file=None):
+        """
+        Devuelve las columnas solicitadas para las estaciones 'names', en el mismo
+        orden. Las estaciones que no están en el archivo quedan con NaN.
+        """
+        return self._load(file)[2].reindex(names)[columns]
+
+
+stations = StationRegistry(config["files"]["list"])
+
+
+@metrics.instrument
 class Utils:
     """
     Clase para añadir coordenadas y provincias.
@@ -1077,26 +1486,18 @@ class Utils:
         self.file = file
 
     def add_lat_lon(self):
-        file = pd.read_excel(self.file)
-
-        coords = file[file.Nombre.isin(self.df.index)][["Lat", "Lon"]]
-        lat = coords["Lat"].tolist()
-        lon = coords["Lon"].tolist()
+        coords = stations.by_name(self.df.index, ["Lat", "Lon"], self.file)
 
-        self.df.insert(0, "Lat", value=lat)
-        self.df.insert(1, "Lon", value=lon)
+        self.df.insert(0, "Lat", value=coords["Lat"].values)
+        self.df.insert(1, "Lon", value=coords["Lon"].values)
 
         return self.df
 
     def add_lat_lon_prov(self):
-        file = pd.read_excel(self.file)
-        coords = file[file.Nombre.isin(self.df.index)][["Provincia", "Lat", "Lon"]]
-        prov = coords["Provincia"].tolist()
-        lat = coords["Lat"].tolist()
-        lon = coords["Lon"].tolist()
-
-        self.df.insert(0, "Provincia", value=prov)
-        self.df.insert(1, "Lat", value=lat)
-        self.df.insert(2, "Lon", value=lon)
+        coords = stations.by_name(self.df.index, ["Provincia", "Lat", "Lon"], self.file)
+
+        self.df.insert(0, "Provincia", value=coords["Provincia"].values)
+        self.df.insert(1, "Lat", value=coords["Lat"].values)
+        self.df.insert(2, "Lon", value=coords["Lon"].values)
 
         return self.df
@@ -1,55 +1,45 @@
 import os
-import string
 import sys
 from datetime import datetime
 
-import xlsxwriter as xw
 import yaml
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
 from dashboard import Dashboard
+from src.excel import Formats, workbook, write_frame
 
 # Abrir el archivo YAML
 with open("config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
-ds = Dashboard(graphs=False, from_file=True)
 
-month = datetime.now().strftime("%b")
-today_date = datetime.now().strftime("%d-%m-%y")
+def daily_report(ds):
+    """
+    Genera el resumen diario (últimos datos de cada estación) a partir de un
+    Dashboard ya construido. Devuelve la ruta del archivo generado.
+    """
+    month = datetime.now().strftime("%b")
+    today_date = datetime.now().strftime("%d-%m-%y")
 
-folder = config["paths"]["exported"] + f"/{ds.year}/{month}/"
-os.makedirs(folder) if not os.path.exists(folder) else "No"
+    folder = config["paths"]["exported"] + f"/{ds.year}/{month}/"
+    os.makedirs(folder, exist_ok=True)
 
-# Generar reporte
-wbk = xw.Workbook(folder + "data.xlsx")
+    # Generar reporte
+    path = folder + "data.xlsx"
+    wbk = workbook(path)
 
+    wst = wbk.add_worksheet(f"{today_date}")
 
-wst = wbk.add_worksheet(f"{today_date}")
+    df = ds.last_data_df.reset_index()
 
-df = ds.last_data_df.reset_index()
-df = df.fillna(" ")
+    formats = Formats(wbk)
+    write_frame(wst, df, formats.get(bold=True), formats.get())
 
-# Escribir header
-fmt = wbk.add_format(
-    {
-        "bold": True,
-        "border": 1,
-        "align": "center",
-    }
-)
-abc = list(string.ascii_uppercase)
-cl = abc[: len(df.columns)]
-tt = df.columns
-for c, t in zip(cl, tt):
-    wst.write("%s1" % c, t, fmt)
+    wbk.close()
+    return path
 
-for j, cc in enumerate(df.columns):
-    for i in range(len(df)):
-        ps = "%s%d" % (cl[j], i + 2)
-        vv = df[cc][i]
-        wst.write(ps, vv, wbk.add_format({"border": 1}))
 
-wbk.close()
+if __name__ == "__main__":
+    daily_report(Dashboard(graphs=False, from_file=True))
@@ -0,0 +1,68 @@
+import numpy as np
+import xlsxwriter as xw
+
+
+def workbook(path):
+    """
+    Crea un libro de excel en modo constant_memory: cada fila se guarda en disco
+    apenas se pasa a la siguiente, así que la memoria usada no depende del tamaño
+    de las hojas. Las hojas deben escribirse fila por fila (ver write_frame).
+    """
+    return xw.Workbook(path, {"constant_memory": True})
+
+
+def write_frame(wst, df, header_fmt, fmt):
+    """
+    Escribe un dataframe completo en la hoja, fila por fila y con direcciones
+    (fila, columna): encabezado en la fila 0 y datos desde la fila 1. Los valores
+    vacíos se escriben como " ".
+
+    Parámetros:
+    wst: hoja de xlsxwriter.
+    df: dataframe a escribir.
+    header_fmt: formato del encabezado.
+    fmt: formato de todas las celdas, o arreglo (filas x columnas) con el formato
+         de cada celda.
+    """
+    values = df.fillna(" ").to_numpy(dtype=object)
+    wst.write_row(0, 0, df.columns, header_fmt)
+
+    if not isinstance(fmt, np.ndarray):
+        for i, row in enumerate(values):
+            wst.write_row(i + 1, 0, row, fmt)
+        return wst
+
+    for i, (row, row_fmt) in enumerate(zip(values, fmt)):
+        for j, (vv, cell_fmt) in enumerate(zip(row, row_fmt)):
+            wst.write(i + 1, j, vv, cell_fmt)
+    return wst
+
+
+class Formats:
+    """
+    Formatos de celda de un libro de excel. Cada add_format() de xlsxwriter crea un
+    formato nuevo, así que aquí se crea uno solo por combinación de
+    (color de fondo, borde, negrita) y se reutiliza en todas las hojas del libro.
+
+    Parámetros:
+    wbk: libro de xlsxwriter.
+    """
+
+    def __init__(self, wbk):
+        self.wbk = wbk
+        self._formats = {}
+
+    def get(self, bg_color=None, border=1, bold=False):
+        """
+        Devuelve el formato con color de fondo, borde y negrita indicados. Los
+        formatos en negrita (encabezados) van centrados.
+        """
+        key = (bg_color, border, bold)
+        if key not in self._formats:
+            props = {"border": border}
+            if bold:
+                props.update({"bold": True, "align": "center"})
+            if bg_color is not None:
+                props["bg_color"] = bg_color
+            self._formats[key] = self.wbk.add_format(props)
+        return self._formats[key]
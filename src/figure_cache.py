@@ -0,0 +1,106 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from src.filelock import file_lock
+from src.lazy import LazyModule
+
+# plotly solo se necesita para guardar figuras nuevas
+pio = LazyModule("plotly.io")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FigureCache:
+    """
+    Figuras del Dashboard ya serializadas (json), guardadas en una carpeta por
+    fecha y datos: {path}/{fecha}_{hash de los datos}/{nombre}.json. Si al volver a
+    iniciar el dashboard no cambiaron los datos de lvera, ni los archivos de
+    entrada, ni la configuración, las figuras se leen de aquí como diccionarios
+    (que dcc.Graph acepta tal cual) en lugar de generarlas otra vez con pandas y
+    plotly. Las lecturas y escrituras usan un candado entre procesos (archivo
+    .lock en path), como en StationArchive.
+
+    Parámetros:
+    path: carpeta del caché.
+    date: fecha de los gráficos (string).
+    arrays: arreglos con los datos a partir de los cuales se generan las figuras.
+    sources: archivos con el código que genera las figuras; si cambian, las
+             figuras guardadas ya no se usan.
+    inputs: otros archivos que usan las figuras (umbrales, lista de estaciones);
+            se comparan por fecha de modificación y tamaño.
+    settings: valores de configuración que usan las figuras.
+    """
+
+    def __init__(self, path, date, arrays, sources=(), inputs=(), settings=()):
+        digest = hashlib.sha1()
+        for arr in arrays:
+            digest.update(arr.tobytes())
+            digest.update(str(arr.shape).encode())
+        for source in sources:
+            with open(source, "rb") as f:
+                digest.update(f.read())
+        for file in inputs:
+            stat = os.stat(file)
+            digest.update(f"{file}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        for value in settings:
+            digest.update(repr(value).encode())
+
+        self.path = path
+        self.folder = os.path.join(path, f"{date}_{digest.hexdigest()[:16]}")
+        self.lock_file = os.path.join(path, ".lock")
+        self.saved = set()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Devuelve un diccionario {nombre: figura} con las figuras guardadas para
+        estos datos (vacío si aún no hay ninguna).
+        """
+        figures = {}
+        with file_lock(self.lock_file, shared=True):
+            for file in glob.glob(os.path.join(self.folder, "*.json")):
+                name = os.path.splitext(os.path.basename(file))[0]
+                with open(file, "rb") as f:
+                    figures[name] = orjson.loads(f.read()) if orjson else json.load(f)
+                self.saved.add(name)
+        return figures
+
+    def save(self, figures):
+        """
+        Guarda las figuras que aún no están en el caché y borra las carpetas de
+        datos anteriores.
+
+        Parámetros:
+        figures: diccionario {nombre: figura}.
+        """
+        with self._lock:
+            new = {n: fig for n, fig in figures.items() if n not in self.saved}
+            self.saved.update(new)
+        if not new:
+            return
+
+        engine = "orjson" if orjson else "json"
+        texts = {
+            name: pio.to_json(fig, validate=False, engine=engine)
+            for name, fig in new.items()
+        }
+
+        with file_lock(self.lock_file):
+            os.makedirs(self.folder, exist_ok=True)
+            for name, text in texts.items():
+                # Escritura atómica: si se interrumpe, no queda un archivo a medias
+                tmp = os.path.join(self.folder, f".{name}.{threading.get_ident()}.tmp")
+                with open(tmp, "w") as f:
+                    f.write(text)
+                os.replace(tmp, os.path.join(self.folder, f"{name}.json"))
+
+            for folder in glob.glob(os.path.join(self.path, "*_*")):
+                if folder != self.folder:
+                    shutil.rmtree(folder, ignore_errors=True)
@@ -0,0 +1,30 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """
+    Candado entre procesos (por ejemplo, los workers de gunicorn) sobre el archivo
+    path, que se crea si no existe. Con shared=True varios procesos pueden tenerlo
+    a la vez (lectura), pero ninguno mientras otro lo tenga sin shared (escritura).
+
+    En Windows no hay fcntl y el candado no hace nada: ahí el dashboard se sirve
+    con un solo proceso (python app.py).
+    """
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
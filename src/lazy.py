@@ -0,0 +1,25 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Módulo que se importa recién la primera vez que se usa uno de sus atributos
+    (por ejemplo go.Figure). Así, quien solo lee datos (Dashboard(graphs=False) y
+    los reportes) no paga la importación de plotly, dash o requests.
+
+    Parámetros:
+    name: nombre completo del módulo (por ejemplo 'plotly.graph_objects').
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "importado" if self._module is not None else "sin importar"
+        return f"<LazyModule {self._name} ({state})>"
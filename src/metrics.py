@@ -0,0 +1,172 @@
+import functools
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+
+import yaml
+
+# Abrir el archivo YAML
+with open("config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+
+class Metrics:
+    """
+    Mediciones de tiempo y memoria del proceso (opcional, ver 'metrics' en
+    config.yaml). Por cada método o función instrumentada se acumulan el número de
+    llamadas, el tiempo real, el tiempo de CPU del hilo y la memoria asignada
+    (diferencia de tracemalloc entre el inicio y el final de la llamada; con varios
+    hilos incluye lo asignado por los demás). Además lleva contadores por nombre,
+    como las lecturas de excel y las figuras generadas.
+
+    Desactivado, cada llamada instrumentada solo agrega una comprobación.
+
+    Parámetros:
+    enabled: True para registrar las mediciones (inicia tracemalloc).
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+    def count(self, name, n=1):
+        """
+        Suma n al contador 'name'.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, wall, cpu, alloc):
+        with self._lock:
+            stage = self.stages.setdefault(
+                name,
+                {
+                    "calls": 0,
+                    "wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "alloc_bytes": 0,
+                    "max_wall_seconds": 0.0,
+                },
+            )
+            stage["calls"] += 1
+            stage["wall_seconds"] += wall
+            stage["cpu_seconds"] += cpu
+            stage["alloc_bytes"] += alloc
+            stage["max_wall_seconds"] = max(stage["max_wall_seconds"], wall)
+
+    def timed(self, name=None):
+        """
+        Decorador que mide cada llamada a la función. Por defecto se registra con
+        el nombre de la función (__qualname__).
+        """
+
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                wall, cpu = time.perf_counter(), time.thread_time()
+                memory = tracemalloc.get_traced_memory()[0]
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(
+                        label,
+                        time.perf_counter() - wall,
+                        time.thread_time() - cpu,
+                        tracemalloc.get_traced_memory()[0] - memory,
+                    )
+
+            return wrapper
+
+        return decorator
+
+    def instrument(self, cls):
+        """
+        Decorador de clase: mide __init__ y los métodos públicos definidos en la
+        clase, con el nombre '{clase}.{método}'.
+        """
+        for attr, value in list(vars(cls).items()):
+            if inspect.isfunction(value) and (
+                attr == "__init__" or not attr.startswith("_")
+            ):
+                setattr(cls, attr, self.timed(f"{cls.__name__}.{attr}")(value))
+        return cls
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "stages": {name: dict(st) for name, st in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    def prometheus(self):
+        """
+        Mediciones en el formato de texto de Prometheus (métricas 'dashboard_*',
+        con la etiqueta 'name' para cada método o función).
+        """
+        data = self.to_dict()
+        series = [
+            ("calls_total", "counter", "calls", "Llamadas."),
+            ("wall_seconds_total", "counter", "wall_seconds", "Tiempo real."),
+            ("cpu_seconds_total", "counter", "cpu_seconds", "Tiempo de CPU del hilo."),
+            ("max_wall_seconds", "gauge", "max_wall_seconds", "Llamada más lenta."),
+        ]
+
+        lines = []
+        for metric, kind, key, help_text in series:
+            lines.append(f"# HELP dashboard_{metric} {help_text}")
+            lines.append(f"# TYPE dashboard_{metric} {kind}")
+            for name, stage in sorted(data["stages"].items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'dashboard_{metric}{{name="{label}"}} {stage[key]}')
+
+        # Memoria asignada en cada llamada, como summary (suma y número de llamadas):
+        # la suma puede bajar, porque una llamada puede liberar más de lo que asigna
+        lines.append(
+            "# HELP dashboard_alloc_bytes Memoria asignada por llamada (tracemalloc)."
+        )
+        lines.append("# TYPE dashboard_alloc_bytes summary")
+        for name, stage in sorted(data["stages"].items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(
+                f'dashboard_alloc_bytes_sum{{name="{label}"}} {stage["alloc_bytes"]}'
+            )
+            lines.append(
+                f'dashboard_alloc_bytes_count{{name="{label}"}} {stage["calls"]}'
+            )
+
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"# TYPE dashboard_{name}_total counter")
+            lines.append(f"dashboard_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(config.get("metrics", False))
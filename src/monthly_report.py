@@ -1,265 +1,254 @@
+import argparse
 import os
-import string
 import sys
+from calendar import monthrange
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
-import xlsxwriter as xw
 import yaml
 from dateutil.relativedelta import relativedelta
 
-from calculations import Anomalies, Clasification, Decadiarias, Utils
-
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
 from dashboard import Dashboard
+from src.calculations import Anomalies, Clasification, Decadiarias, Utils
+from src.excel import Formats, workbook, write_frame
 
 # Abrir el archivo YAML
 with open("config.yaml", "r") as f:
     config = yaml.safe_load(f)
 
-ds = Dashboard(graphs=False, from_file=True)
-month = datetime.now().strftime("%b")
-folder = config["paths"]["exported"] + f"/{ds.year}/{month}/"
-os.makedirs(folder) if not os.path.exists(folder) else "No"
-
-if ds.day == 1:
-    this_month = ds.past_month
-    month = (ds.today - relativedelta(months=1)).strftime("%b")
-    this_month_day_list = ds.past_month_days_list
-else:
-    this_month = ds.this_month
-    month = ds.today.strftime("%b")
-    this_month_day_list = ds.this_month_days_list
-
-abc = list(string.ascii_uppercase)
-
 
 class ExcelWriter:
-    def __init__(self, wbk, wst):
+    def __init__(self, wbk, wst, formats):
         self.wbk = wbk
         self.wst = wst
+        self.formats = formats
 
-    def no_color_cell(self, df, extend=False):
-        df = df.fillna(" ")
-
-        # Escribir header
-        fmt = self.wbk.add_format(
-            {
-                "bold": True,
-                "border": 1,
-                "align": "center",
-            }
+    def no_color_cell(self, df):
+        return write_frame(
+            self.wst, df, self.formats.get(bold=True), self.formats.get()
         )
-        cl = abc[: len(df.columns)]
-        if extend:
-            cl.extend(["AA", "AB", "AC", "AD", "AE", "AF"])
-
-        tt = df.columns
-        for c, t in zip(cl, tt):
-            self.wst.write("%s1" % c, t, fmt)
-
-        for j, cc in enumerate(df.columns):
-            for i in range(len(df)):
-                ps = "%s%d" % (cl[j], i + 2)
-                vv = df[cc][i]
-                self.wst.write(ps, vv, self.wbk.add_format({"border": 1}))
 
-        return self.wst
-
-    def colored_cell(self, var, ds, this_month, this_month_day_list):
+    def colored_cell(self, var, df, categories, days_list):
         if var not in ["tmax", "pp", "tmin"]:
             raise ValueError("Variable no soportada")
 
-        if var == "tmax":
-            data = ds.mx
-            thresholds = ["p90", "p95", "p99"]
-            ad = [[255, 255, 0], [255, 192, 0], [255, 0, 0]]
-            comparison_operator = lambda vv, xx: vv >= xx
-        elif var == "pp":
-            data = ds.pp
-            thresholds = ["p90", "p95", "p99"]
-            ad = [[255, 255, 0], [255, 192, 0], [255, 0, 0]]
-            comparison_operator = lambda vv, xx: vv >= xx
-        elif var == "tmin":
-            data = ds.mn
-            thresholds = ["normal_f", "p10", "p5", "p1"]
-            ad = [[167, 234, 82], [255, 255, 0], [255, 192, 0], [255, 0, 0]]
-            comparison_operator = lambda vv, xx: vv <= xx
-
-        clasif = Clasification(var, data, this_month, this_month_day_list, ds.umb_path)
-        df = clasif.prep_df.drop(columns=["id"])
-        df = df.fillna(" ")
-
-        fmt = self.wbk.add_format(
-            {
-                "bold": True,
-                "border": 1,
-                "align": "center",
-                "bg_color": "#%02x%02x%02x" % (217, 217, 217),
-            }
+        # Formato de cada categoría (ver classify), con los colores del dashboard.
+        # La posición en cat_fmt es la categoría + 1.
+        colors = {**Clasification.colors[var], 0: "FFFFFF", -1: "e6e6e6"}
+        cat_fmt = np.empty(len(colors), dtype=object)
+        for cat, color in colors.items():
+            cat_fmt[cat + 1] = self.formats.get(color)
+
+        fmt = np.full(df.shape, self.formats.get(), dtype=object)
+        day_cols = [df.columns.get_loc(day) for day in days_list]
+        fmt[:, day_cols] = cat_fmt[categories + 1]
+
+        header_fmt = self.formats.get("#%02x%02x%02x" % (217, 217, 217), bold=True)
+        return write_frame(self.wst, df, header_fmt, fmt)
+
+
+def month_sheets(ds, period=None):
+    """
+    Calcula las hojas del reporte mensual a partir de un Dashboard ya construido:
+    promedios, anomalías, decadiarias, datos diarios y caracterización.
+    Devuelve una lista de tuplas (nombre de la hoja, dataframe, color), donde color
+    es None para las hojas sin colores o (variable, categorías, días) para las de
+    caracterización. Solo contiene datos, así que puede calcularse en otro proceso.
+
+    period: (año, mes) a reportar, para todas las variables. Por defecto, el mes
+    actual para la temperatura mínima y, para las demás, el mes anterior si hoy es
+    día 1.
+    """
+    tmin_month, tmin_day_list = ds.this_month, ds.this_month_days_list
+    if period is not None:
+        year, this_month = period
+        tmin_month = this_month
+        this_month_day_list = tmin_day_list = list(
+            map(str, range(1, monthrange(year, this_month)[1] + 1))
         )
-        cl = abc[: len(df.columns)]
-        cl.extend(["AA", "AB", "AC", "AD", "AE", "AF"])
-        tt = df.columns
-        ss = df.ESTACIONES.values
-
-        for c, t in zip(cl, tt):
-            self.wst.write("%s1" % c, t, fmt)
-
-        for i, s in enumerate(ss):
-            rr = [clasif.__dict__[threshold][s].values[0] for threshold in thresholds]
-
-            for j in range(len(tt)):
-                ps = "%s%d" % (cl[j], i + 2)
-                vv = df.loc[i, tt[j]]
-
-                if isinstance(vv, str):
-                    self.wst.write(ps, vv, self.wbk.add_format({"border": 1}))
-                else:
-                    um = 0
-                    for xx in rr:
-                        if comparison_operator(vv, xx):
-                            um += 1
-                    if np.isnan(vv):
-                        vv = " "
-
-                    if um == 0:
-                        self.wst.write(
-                            ps,
-                            vv,
-                            self.wbk.add_format({"bg_color": "FFFFFF", "border": 1}),
-                        )
-                    else:
-                        r, g, b = ad[um - 1]
-                        col = "#%02x%02x%02x" % (r, g, b)
-                        self.wst.write(
-                            ps, vv, self.wbk.add_format({"bg_color": col, "border": 1})
-                        )
-
-                if vv == " ":
-                    self.wst.write(
-                        ps, vv, self.wbk.add_format({"bg_color": "e6e6e6", "border": 1})
-                    )
-
-        return self.wst
-
-
-# Creando hoja de excel
-wbk = xw.Workbook(os.path.join(folder, f"{this_month}_{month}_DATOS.xlsx"))
-
-# HOJA CON PROMEDIOS Y ACUMULADOS MENSUALES
-wst_means = wbk.add_worksheet("Means")
-
-# Calculo
-tmin_mean = ds.get_monthly_means("tmin", ds.mn, ds.this_month).rename(
-    columns={"Mean": "TMIN"}
-)
-tmax_mean = ds.get_monthly_means("tmax", ds.mx, this_month).rename(
-    columns={"Mean": "TMAX"}
-)
-pp_sum = ds.get_monthly_means("pp", ds.pp, this_month).rename(columns={"Sum": "PP"})
-
-# Combinando datos en un solo dataframe
-df_means = pd.DataFrame(
-    {"TMAX": tmax_mean["TMAX"], "TMIN": tmin_mean["TMIN"], "PP": pp_sum["PP"]}
-).reindex(columns=["TMAX", "TMIN", "PP"])
-
-# Añadiendo coordenadas
-df = Utils(df_means, ds.file).add_lat_lon().rename_axis("Estaciones").reset_index()
-
-ExcelWriter(wbk, wst_means).no_color_cell(df)
-
-# HOJA DE ANOMALÍAS
-wst_anomalies = wbk.add_worksheet("Anomalies")
-
-amn = Anomalies(
-    "tmin", tmin_mean, ds.this_month, ds.file, ds.file_w_normals
-).calculate_anomalies()
-amx = Anomalies(
-    "tmax", tmax_mean, this_month, ds.file, ds.file_w_normals
-).calculate_anomalies()
-app = Anomalies(
-    "pp", pp_sum, this_month, ds.file, ds.file_w_normals
-).calculate_anomalies()
-
-df_anomalies = pd.DataFrame(
-    {"TMAX": amx["anomaly"], "TMIN": amn["anomaly"], "PP": app["anomaly"]}
-).reindex(columns=["TMAX", "TMIN", "PP"])
-
-df = Utils(df_anomalies, ds.file).add_lat_lon().rename_axis("Estaciones").reset_index()
-
-ExcelWriter(wbk, wst_anomalies).no_color_cell(df)
-
-# HOJA DE DECADIARIAS
-wst_dec = wbk.add_worksheet("Dec")
-
-df = Decadiarias(ds.pp, this_month, ds.file, ds.dec_file).calculate_anom().iloc[:, :-3]
-
-ExcelWriter(wbk, wst_dec).no_color_cell(df)
-
-# HOJA CON DATOS DIARIOS DE TMAX (todas las estaciones)
-wst_tmax = wbk.add_worksheet("TMAX")
-
-# Extrayendo los datos del mes actual
-df_tmax = ds.mx[ds.mx.index.month == this_month]
-
-df = pd.DataFrame(index=this_month_day_list, columns=df_tmax.columns)
-
-for i in range(len(df_tmax)):
-    df.iloc[i] = df_tmax.values[i]
-
-df = df.T[~df.T.index.isin(config["plu_st"])]
-df = df.rename_axis("Estaciones").reset_index()
-
-ExcelWriter(wbk, wst_tmax).no_color_cell(df, extend=True)
-
-# HOJA CON DATOS DIARIOS DE TMIN (todas las estaciones)
-wst_tmin = wbk.add_worksheet("TMIN")
-
-# Extrayendo los datos del mes actual
-df_tmin = ds.mn[ds.mn.index.month == ds.this_month]
-
-df = pd.DataFrame(index=ds.this_month_days_list, columns=df_tmin.columns)
-
-for i in range(len(df_tmin)):
-    df.iloc[i] = df_tmin.values[i]
-
-df = df.T[~df.T.index.isin(config["plu_st"])]
-df = df.rename_axis("Estaciones").reset_index()
-
-ExcelWriter(wbk, wst_tmin).no_color_cell(df, extend=True)
-
-# HOJA CON DATOS DIARIOS DE PP (todas las estaciones)
-wst_pp = wbk.add_worksheet("PP")
-
-# Extrayendo los datos del mes actual
-df_pp = ds.pp[ds.pp.index.month == this_month]
-
-df = pd.DataFrame(index=this_month_day_list, columns=df_pp.columns)
-
-for i in range(len(df_pp)):
-    df.iloc[i] = df_pp.values[i]
-
-df = df.T.rename_axis("Estaciones").reset_index()
-
-ExcelWriter(wbk, wst_pp).no_color_cell(df, extend=True)
-
-# HOJA DE CARACTERIZACIÓN DE TMAX
-wst_ctmax = wbk.add_worksheet("cTmax")
-
-ExcelWriter(wbk, wst_ctmax).colored_cell("tmax", ds, this_month, this_month_day_list)
-
-# HOJA DE CARACTERIZACIÓN DE TMIN
-wst_ctmin = wbk.add_worksheet("cTmin")
-
-ExcelWriter(wbk, wst_ctmin).colored_cell("tmin", ds, this_month, this_month_day_list)
-
-# HOJA DE CARACTERIZACIÓN DE PP
-wst_cpp = wbk.add_worksheet("cPP")
-# data_w_color(wbk, wst_cpp, 'pp', ds, this_month, this_month_day_list)
-ExcelWriter(wbk, wst_cpp).colored_cell("pp", ds, this_month, this_month_day_list)
-
-wbk.close()
+    elif ds.day == 1:
+        this_month = ds.past_month
+        this_month_day_list = ds.past_month_days_list
+    else:
+        this_month = ds.this_month
+        this_month_day_list = ds.this_month_days_list
+
+    sheets = []
+
+    # HOJA CON PROMEDIOS Y ACUMULADOS MENSUALES
+    tmin_mean = ds.get_monthly_means("tmin", tmin_month).rename(
+        columns={"Mean": "TMIN"}
+    )
+    tmax_mean = ds.get_monthly_means("tmax", this_month).rename(
+        columns={"Mean": "TMAX"}
+    )
+    pp_sum = ds.get_monthly_means("pp", this_month).rename(columns={"Sum": "PP"})
+
+    # Combinando datos en un solo dataframe
+    df_means = pd.DataFrame(
+        {"TMAX": tmax_mean["TMAX"], "TMIN": tmin_mean["TMIN"], "PP": pp_sum["PP"]}
+    ).reindex(columns=["TMAX", "TMIN", "PP"])
+
+    # Añadiendo coordenadas
+    df = Utils(df_means, ds.file).add_lat_lon().rename_axis("Estaciones").reset_index()
+    sheets.append(("Means", df, None))
+
+    # HOJA DE ANOMALÍAS
+    amn = Anomalies(
+        "tmin", tmin_mean, tmin_month, ds.file, ds.file_w_normals
+    ).calculate_anomalies()
+    amx = Anomalies(
+        "tmax", tmax_mean, this_month, ds.file, ds.file_w_normals
+    ).calculate_anomalies()
+    app = Anomalies(
+        "pp", pp_sum, this_month, ds.file, ds.file_w_normals
+    ).calculate_anomalies()
+
+    df_anomalies = pd.DataFrame(
+        {"TMAX": amx["anomaly"], "TMIN": amn["anomaly"], "PP": app["anomaly"]}
+    ).reindex(columns=["TMAX", "TMIN", "PP"])
+
+    df = (
+        Utils(df_anomalies, ds.file)
+        .add_lat_lon()
+        .rename_axis("Estaciones")
+        .reset_index()
+    )
+    sheets.append(("Anomalies", df, None))
+
+    # HOJA DE DECADIARIAS
+    df = Decadiarias(
+        ds.pp, this_month, ds.file, ds.dec_file, ds.months["PP"][this_month].dekads()
+    ).calculate_anom()
+    sheets.append(("Dec", df.iloc[:, :-3], None))
+
+    # HOJAS CON DATOS DIARIOS (todas las estaciones)
+    daily = [
+        ("TMAX", ds.mx, this_month, this_month_day_list, True),
+        ("TMIN", ds.mn, tmin_month, tmin_day_list, True),
+        ("PP", ds.pp, this_month, this_month_day_list, False),
+    ]
+    for name, data, sheet_month, days_list, drop_plu in daily:
+        # Extrayendo los datos del mes
+        data = data[data.index.month == sheet_month]
+
+        df = pd.DataFrame(index=days_list, columns=data.columns)
+
+        for i in range(len(data)):
+            df.iloc[i] = data.values[i]
+
+        df = df.T
+        if drop_plu:
+            df = df[~df.index.isin(config["plu_st"])]
+        sheets.append((name, df.rename_axis("Estaciones").reset_index(), None))
+
+    # HOJAS DE CARACTERIZACIÓN
+    for name, var in [("cTmax", "tmax"), ("cTmin", "tmin"), ("cPP", "pp")]:
+        clasif = ds.get_classification(var, this_month, this_month_day_list)
+        df = clasif.prep_df.drop(columns=["id"])
+        color = (var, clasif.categories, this_month_day_list)
+        sheets.append((name, df, color))
+
+    return sheets
+
+
+def write_sheets(wbk, formats, sheets, suffix=""):
+    """
+    Escribe en el libro las hojas calculadas con month_sheets().
+    """
+    for name, df, color in sheets:
+        writer = ExcelWriter(wbk, wbk.add_worksheet(name + suffix), formats)
+        if color is None:
+            writer.no_color_cell(df)
+        else:
+            writer.colored_cell(color[0], df, *color[1:])
+
+
+def monthly_report(ds):
+    """
+    Genera el reporte mensual (promedios, anomalías, decadiarias, datos diarios y
+    caracterización) a partir de un Dashboard ya construido. Devuelve la ruta del
+    archivo generado.
+    """
+    month = datetime.now().strftime("%b")
+    folder = config["paths"]["exported"] + f"/{ds.year}/{month}/"
+    os.makedirs(folder, exist_ok=True)
+
+    if ds.day == 1:
+        this_month = ds.past_month
+        month = (ds.today - relativedelta(months=1)).strftime("%b")
+    else:
+        this_month = ds.this_month
+        month = ds.today.strftime("%b")
+
+    # Creando hoja de excel
+    path = os.path.join(folder, f"{this_month}_{month}_DATOS.xlsx")
+    wbk = workbook(path)
+    write_sheets(wbk, Formats(wbk), month_sheets(ds))
+    wbk.close()
+    return path
+
+
+def archive_month_sheets(last_day):
+    """
+    Hojas del reporte del mes de last_day, con los datos del archivo de series
+    hasta ese día (se ejecuta en un proceso aparte).
+    """
+    ds = Dashboard(graphs=False, today=last_day)
+    return month_sheets(ds, (last_day.year, last_day.month))
+
+
+def season_report(start, end, workers=None):
+    """
+    Genera un solo libro con las hojas del reporte mensual para cada mes entre
+    start y end (por ejemplo, la temporada de lluvias DEF o un año hidrológico),
+    a partir del archivo de series. Los meses se calculan en paralelo, en procesos
+    aparte, y las hojas de cada mes llevan el sufijo '_{año}-{mes}'. Devuelve la
+    ruta del archivo generado.
+
+    start y end solo eligen los meses: cada mes se reporta completo, salvo el mes
+    en curso, que llega hasta hoy (se omite si hoy es día 1, como en el reporte
+    mensual).
+
+    Parámetros:
+    start, end: fechas inicial y final (por ejemplo '2024-12-01', '2025-02-28').
+    workers: número de procesos. Por defecto, uno por núcleo.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    today = pd.Timestamp(datetime.now()).normalize()
+    months = [m for m in pd.period_range(start, end, freq="M") if m.start_time < today]
+    last_days = [min(m.end_time.normalize(), today).to_pydatetime() for m in months]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        sheets = list(executor.map(archive_month_sheets, last_days))
+
+    folder = os.path.join(config["paths"]["exported"], "Temporadas")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(
+        folder, f"{start.strftime('%Y-%m-%d')}_{end.strftime('%Y-%m-%d')}_DATOS.xlsx"
+    )
+
+    wbk = workbook(path)
+    formats = Formats(wbk)
+    for month, month_sheet in zip(months, sheets):
+        write_sheets(wbk, formats, month_sheet, suffix=f"_{month}")
+    wbk.close()
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start", help="Fecha inicial (reporte por temporada)")
+    parser.add_argument("--end", help="Fecha final (reporte por temporada)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.start and args.end:
+        print(season_report(args.start, args.end, args.workers))
+    else:
+        monthly_report(Dashboard(graphs=False, from_file=True))
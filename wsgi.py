@@ -0,0 +1,33 @@
+"""
+Punto de entrada para producción con gunicorn (ver gunicorn.conf.py). Desde el
+directorio raíz:
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Con preload_app, este módulo se importa una sola vez en el proceso principal:
+ahí se leen los datos de lvera y se generan todos los gráficos y pestañas del
+Dashboard. Los workers se crean después (fork) y comparten esos datos con el
+proceso principal (copy-on-write), en lugar de construir cada uno su Dashboard.
+"""
+import gc
+
+import layout
+from app import app
+
+
+def warm_up(ds):
+    """
+    Genera todos los gráficos del Dashboard y el contenido de todas las pestañas.
+    """
+    ds.get_graphs()
+    for value in layout.tab_builders:
+        layout.tab_body(ds, value)
+
+
+warm_up(layout.snapshot.ds)
+
+# Los objetos creados hasta aquí quedan fuera del recolector de basura, que así
+# no escribe en sus páginas de memoria y estas siguen compartidas con los workers
+gc.freeze()
+
+server = app.server